@@ -26,46 +26,141 @@ def create_app(config_name='default'):
     
     # Initialize services
     from app.services.yolo_service import YOLOService
-    from app.services.camera_service import CameraService
-    from app.services.recorder_service import RecorderService
+    from app.services.camera_manager import CameraManager
+    from app.services.batch_service import BatchInferenceService
+    from app.services.inference_pool import InferencePool
+    from app.services.event_service import EventStream
+    from app.services.log_service import DetectionLog
+    from app.services.jpeg_encoder import JpegEncoder
     
     print("\n🚀 Initializing AGKS...")
     
-    # Initialize YOLO model
-    yolo_service = YOLOService(config[config_name].MODEL_PATH)
+    # Initialize YOLO model (shared by all cameras)
+    yolo_service = YOLOService(
+        config[config_name].MODEL_PATH,
+        backend=config[config_name].MODEL_BACKEND,
+        int8=config[config_name].MODEL_INT8,
+        inference_size=config[config_name].INFERENCE_SIZE,
+        validate=config[config_name].MODEL_VALIDATE,
+        validation_images=config[config_name].MODEL_VALIDATION_IMAGES,
+        min_agreement=config[config_name].MODEL_MIN_AGREEMENT,
+        calibration_data=config[config_name].MODEL_CALIBRATION_DATA
+    )
     app.yolo_service = yolo_service
     
-    # Initialize camera
-    camera_service = CameraService(
-        camera_index=config[config_name].CAMERA_INDEX,
-        width=config[config_name].CAMERA_WIDTH,
-        height=config[config_name].CAMERA_HEIGHT
+    # JPEG encoder shared by streams, pre-event buffers and Telegram snapshots
+    jpeg_encoder = JpegEncoder(
+        backend=config[config_name].JPEG_ENCODER,
+        subsampling=config[config_name].JPEG_SUBSAMPLING,
+        fast_dct=config[config_name].JPEG_FAST_DCT
+    )
+    app.jpeg_encoder = jpeg_encoder
+    
+    # Run inference in worker processes, or batch frames from all cameras
+    # into shared forward passes
+    inference_service = None
+    if config[config_name].INFERENCE_WORKERS > 0:
+        inference_service = InferencePool(
+            yolo_service,
+            workers=config[config_name].INFERENCE_WORKERS,
+            frame_shape=(config[config_name].CAMERA_HEIGHT, config[config_name].CAMERA_WIDTH, 3),
+            torch_threads=config[config_name].INFERENCE_TORCH_THREADS
+        )
+    elif config[config_name].BATCH_INFERENCE:
+        inference_service = BatchInferenceService(
+            yolo_service,
+            max_batch_size=config[config_name].BATCH_MAX_SIZE,
+            max_wait=config[config_name].BATCH_MAX_WAIT
+        )
+    app.inference_service = inference_service
+    
+    # Push channel for new logs and threat state changes
+    event_stream = EventStream()
+    app.event_stream = event_stream
+    app.detection_log = DetectionLog(
+        max_entries=config[config_name].DETECTION_LOG_SIZE,
+        event_stream=event_stream
     )
-    app.camera_service = camera_service
     
-    # Initialize recorder service
-    recorder_service = RecorderService(
+    # Initialize every configured camera with its own recorder and pipeline
+    camera_manager = CameraManager(
+        cameras=config[config_name].CAMERAS,
+        yolo_service=yolo_service,
+        width=config[config_name].CAMERA_WIDTH,
+        height=config[config_name].CAMERA_HEIGHT,
         alert_folder=config[config_name].ALERT_VIDEO_FOLDER,
         pre_event_seconds=config[config_name].PRE_EVENT_SECONDS,
         post_event_seconds=config[config_name].POST_EVENT_SECONDS,
-        estimated_fps=config[config_name].ESTIMATED_FPS
+        record_fps=config[config_name].RECORD_FPS,
+        default_camera=config[config_name].CAMERA_INDEX,
+        inference_service=inference_service,
+        buffer_mode=config[config_name].PRE_EVENT_BUFFER_MODE,
+        buffer_jpeg_quality=config[config_name].PRE_EVENT_JPEG_QUALITY,
+        segment_folder=config[config_name].SEGMENT_FOLDER if config[config_name].CONTINUOUS_RECORDING else None,
+        segment_seconds=config[config_name].SEGMENT_SECONDS,
+        segment_retention_seconds=config[config_name].SEGMENT_RETENTION_MINUTES * 60,
+        annotate_stream=config[config_name].ANNOTATE_STREAM,
+        annotate_recordings=config[config_name].ANNOTATE_RECORDINGS,
+        annotate_snapshots=config[config_name].ANNOTATE_SNAPSHOTS,
+        stream_tiers=config[config_name].STREAM_TIERS,
+        default_stream_tier=config[config_name].DEFAULT_STREAM_TIER,
+        jpeg_encoder=jpeg_encoder,
+        detection_active_fps=config[config_name].DETECTION_FPS_ACTIVE,
+        detection_idle_fps=config[config_name].DETECTION_FPS_IDLE,
+        detection_every_n_frames=config[config_name].DETECTION_EVERY_N_FRAMES,
+        detection_active_hold_seconds=config[config_name].DETECTION_ACTIVE_HOLD_SECONDS,
+        motion_gating=config[config_name].MOTION_GATING,
+        motion_settings={
+            'sensitivity': config[config_name].MOTION_SENSITIVITY,
+            'pixel_threshold': config[config_name].MOTION_PIXEL_THRESHOLD,
+            'downscale_width': config[config_name].MOTION_DOWNSCALE_WIDTH,
+            'force_interval': config[config_name].MOTION_FORCE_INTERVAL
+        },
+        tracking=config[config_name].TRACKING,
+        tracker_settings={
+            'iou_threshold': config[config_name].TRACKER_IOU_THRESHOLD,
+            'max_age': config[config_name].TRACKER_MAX_AGE
+        },
+        threat_frames_required=config[config_name].THREAT_FRAMES_REQUIRED,
+        threat_frames_window=config[config_name].THREAT_FRAMES_WINDOW,
+        threat_rules=config[config_name].THREAT_RULES,
+        event_stream=event_stream
     )
-    app.recorder_service = recorder_service
+    app.camera_manager = camera_manager
+    
+    # Default camera services (single-camera compatibility)
+    default_channel = camera_manager.get_default()
+    app.camera_service = default_channel.camera_service
+    app.recorder_service = default_channel.recorder_service
+    app.vision_pipeline = default_channel.pipeline
     
     # Initialize database service
     from app.services.database_service import DatabaseService
-    database_service = DatabaseService('database/alerts.db')
+    database_service = DatabaseService(
+        config[config_name].DATABASE_PATH,
+        batch_size=config[config_name].DB_WRITE_BATCH_SIZE,
+        flush_interval=config[config_name].DB_WRITE_FLUSH_INTERVAL
+    )
     app.database_service = database_service
     
+    # Alert videos are deleted off the request threads
+    from app.services.video_janitor import VideoJanitor
+    app.video_janitor = VideoJanitor(config[config_name].ALERT_VIDEO_FOLDER)
+    
     # Register routes
     from app import routes
     routes.register_routes(app)
     
+    # Start pipelines once threat handling is wired up
+    camera_manager.start_all()
+    
     # Setup graceful shutdown
     def signal_handler(sig, frame):
         print("\n\n🛑 Shutting down gracefully...")
-        if hasattr(app, 'camera_service'):
-            app.camera_service.cleanup()
+        if hasattr(app, 'camera_manager'):
+            app.camera_manager.stop_all()
+        if hasattr(app, 'database_service'):
+            app.database_service.close()
         print("✅ Cleanup complete. Goodbye!")
         sys.exit(0)
     
@@ -0,0 +1,294 @@
+"""
+AGKS - ASGI Application
+Serves MJPEG streams and server-sent events from an event loop; other routes are handled by Flask
+"""
+
+import asyncio
+import re
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+
+VIDEO_FEED_PATH = re.compile(r'^/video_feed/(?P<target>[^/]+)$')
+EVENTS_KEEPALIVE = 15.0
+
+
+class StreamRelay:
+    """
+    Hands one camera tier's frames to every async viewer
+
+    A single relay thread subscribes to the pipeline (so the tier is only
+    encoded while someone watches) and wakes all waiting connections on the
+    event loop. Viewers that fall behind skip straight to the newest frame.
+    """
+
+    def __init__(self, pipeline, tier, loop):
+        """
+        Initialize relay
+
+        Args:
+            pipeline: Vision pipeline of the camera
+            tier (str): Stream tier name
+            loop: Event loop serving the viewers
+        """
+        self.pipeline = pipeline
+        self.tier = tier
+        self.loop = loop
+
+        self.lock = threading.Lock()
+        self.subscribers = 0
+        self.thread = None
+
+        self.frame = None
+        self.frame_event = asyncio.Event()
+
+    def _publish(self, frame_bytes):
+        """Store the newest frame and wake every waiting viewer (event loop thread)"""
+        self.frame = frame_bytes
+        event, self.frame_event = self.frame_event, asyncio.Event()
+        event.set()
+
+    def _run(self):
+        """Relay thread: pipeline subscription → event loop"""
+        frames = self.pipeline.subscribe(self.tier)
+        try:
+            for frame_bytes in frames:
+                with self.lock:
+                    if self.subscribers == 0:
+                        self.thread = None
+                        return
+                try:
+                    self.loop.call_soon_threadsafe(self._publish, frame_bytes)
+                except RuntimeError:
+                    # Event loop closed
+                    with self.lock:
+                        self.thread = None
+                    return
+        finally:
+            frames.close()
+
+    async def frames(self):
+        """
+        Async generator yielding each new JPEG frame
+
+        Yields:
+            bytes: JPEG-encoded frame
+        """
+        with self.lock:
+            self.subscribers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+        try:
+            while True:
+                event = self.frame_event
+                await event.wait()
+                yield self.frame
+        finally:
+            with self.lock:
+                self.subscribers -= 1
+
+
+class AsyncStreamHub:
+    """Relays per (camera, tier), created on first viewer"""
+
+    def __init__(self, camera_manager):
+        """
+        Initialize hub
+
+        Args:
+            camera_manager: Camera registry
+        """
+        self.camera_manager = camera_manager
+        self.relays = {}
+
+    def get_relay(self, camera_id, tier):
+        """Get (or create) the relay for a camera tier"""
+        channel = self.camera_manager.get(camera_id)
+        key = (channel.camera_id, tier)
+
+        relay = self.relays.get(key)
+        if relay is None:
+            relay = StreamRelay(channel.pipeline, tier, asyncio.get_running_loop())
+            self.relays[key] = relay
+        return relay
+
+    def get_status(self):
+        """Get viewer counts per relay"""
+        return {
+            f"{camera_id}/{tier}": relay.subscribers
+            for (camera_id, tier), relay in self.relays.items()
+        }
+
+
+async def run_until_disconnect(receive, coroutine):
+    """Run a streaming coroutine until it ends or the client disconnects"""
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(coroutine), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def create_asgi_app(flask_app):
+    """
+    Wrap the Flask application for an ASGI server
+
+    /video_feed streams and /events are served by the event loop (no thread
+    per viewer); every other request runs the Flask view in asgiref's
+    thread pool.
+
+    Args:
+        flask_app: Flask application from create_app()
+
+    Returns:
+        ASGI application callable
+    """
+    wsgi_app = WsgiToAsgi(flask_app)
+    hub = AsyncStreamHub(flask_app.camera_manager)
+    flask_app.stream_hub = hub
+
+    async def send_text(send, status, text):
+        """Send a short plain-text response"""
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')]
+        })
+        await send({'type': 'http.response.body', 'body': text.encode()})
+
+    async def stream(scope, receive, send, match):
+        """Serve /video_feed/<mode> and /video_feed/<camera_id> as MJPEG"""
+        query = parse_qs(scope['query_string'].decode())
+
+        def query_int(name):
+            value = query.get(name, [None])[0]
+            return int(value) if value is not None and value.isdigit() else None
+
+        target = match.group('target')
+        if target.isdigit():
+            mode, camera_id = 'camera', int(target)
+        else:
+            mode, camera_id = target, query_int('camera')
+
+        channel = flask_app.camera_manager.get(camera_id)
+        if channel is None:
+            await send_text(send, 404, "Camera not available")
+            return
+
+        tier = channel.pipeline.resolve_tier(tier=query.get('tier', [None])[0], width=query_int('width'))
+        if tier is None:
+            await send_text(send, 400, "Unknown stream tier")
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'multipart/x-mixed-replace; boundary=frame')]
+        })
+
+        if mode != 'camera':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        async def pump():
+            async for frame_bytes in hub.get_relay(channel.camera_id, tier).frames():
+                await send({
+                    'type': 'http.response.body',
+                    'body': b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n',
+                    'more_body': True
+                })
+
+        await run_until_disconnect(receive, pump())
+
+    async def events(scope, receive, send):
+        """Serve /events (Server-Sent Events) without a thread per browser"""
+        headers = dict(scope['headers'])
+        query = parse_qs(scope['query_string'].decode())
+        since = headers.get(b'last-event-id', b'').decode() or query.get('since', ['0'])[0]
+        since = int(since) if since.isdigit() else 0
+
+        event_stream = flask_app.event_stream
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+
+        def on_publish(sequence):
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # Event loop closed
+                pass
+
+        async def pump():
+            nonlocal since
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')]
+            })
+
+            text, since = event_stream.resume(since, flask_app.camera_manager.get_threat_status())
+            await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+            while True:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                    continue
+
+                wakeup.clear()
+                new_events, complete = event_stream.events_since(since)
+                if not new_events:
+                    continue
+
+                text = "" if complete else "event: reset\ndata: {}\n\n"
+                text += "".join(event.to_sse() for event in new_events)
+                await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+                since = new_events[-1].sequence
+
+        event_stream.add_listener(on_publish)
+        try:
+            await run_until_disconnect(receive, pump())
+        finally:
+            event_stream.remove_listener(on_publish)
+
+    async def lifespan(receive, send):
+        """Stop cameras and pipelines when the server shuts down"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, flask_app.camera_manager.stop_all)
+                if hasattr(flask_app, 'database_service'):
+                    flask_app.database_service.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http':
+            match = VIDEO_FEED_PATH.match(scope['path'])
+            if match is not None:
+                await stream(scope, receive, send, match)
+                return
+            if scope['path'] == '/events':
+                await events(scope, receive, send)
+                return
+
+        await wsgi_app(scope, receive, send)
+
+    return application
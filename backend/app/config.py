@@ -18,18 +18,74 @@ class Config:
     # MODEL CONFIGURATION
     # ============================================
     MODEL_PATH = "models/best.pt"
-    INFERENCE_SIZE = 640  # Increased for better detection accuracy
+    INFERENCE_SIZE = 480  # Image size used at inference (and for exported models)
     CONFIDENCE_THRESHOLD = 0.15  # Lower threshold to catch more detections
     
+    # Inference runtime: 'pytorch', 'onnx' (ONNX Runtime) or 'openvino'.
+    # Exported models are cached next to MODEL_PATH and rebuilt when it changes.
+    MODEL_BACKEND = 'pytorch'
+    MODEL_INT8 = False                  # INT8-quantized export
+    MODEL_CALIBRATION_DATA = None       # Dataset YAML for OpenVINO INT8 calibration
+    MODEL_VALIDATE = True               # Compare the export against PyTorch at startup
+    MODEL_VALIDATION_IMAGES = None      # Folder of frames from your cameras (None = not validated)
+    MODEL_MIN_AGREEMENT = 0.9           # Fall back to PyTorch below this agreement
+    
+    # Batched inference: one forward pass for the latest frame of every camera
+    BATCH_INFERENCE = True
+    BATCH_MAX_SIZE = 8      # Maximum frames per forward pass
+    BATCH_MAX_WAIT = 0.02   # Seconds to wait for a batch to fill
+    
+    # Process-pool inference: run the model in this many worker processes
+    # (frames passed through shared memory). Replaces batching when > 0.
+    INFERENCE_WORKERS = 0
+    INFERENCE_TORCH_THREADS = None  # Torch threads per worker (default: cores / workers)
+    
+    # Detection rate (independent of the displayed frame rate).
+    # Detect faster while a person or threat object is in view, slower when empty;
+    # set DETECTION_EVERY_N_FRAMES to detect every Nth frame instead.
+    DETECTION_FPS_ACTIVE = 8
+    DETECTION_FPS_IDLE = 2
+    DETECTION_EVERY_N_FRAMES = None
+    DETECTION_ACTIVE_HOLD_SECONDS = 5
+    
+    # Motion gate: skip detection while nothing moves in a quiet scene
+    MOTION_GATING = True
+    MOTION_SENSITIVITY = 0.005      # Fraction of pixels that must change
+    MOTION_PIXEL_THRESHOLD = 25     # Grey-level change that counts as motion
+    MOTION_DOWNSCALE_WIDTH = 160    # Comparison image width
+    MOTION_FORCE_INTERVAL = 10      # Seconds between forced detections (0 = never)
+    
+    # Object tracking: keeps boxes on screen between detections
+    TRACKING = True
+    TRACKER_IOU_THRESHOLD = 0.3     # Minimum overlap to continue a track
+    TRACKER_MAX_AGE = 1.0           # Seconds a track survives without detections
+    
+    # Threat rules, checked in order (first match wins). None uses
+    # ThreatLogic.DEFAULT_RULES; to customise, set a list of dicts in the same
+    # format. Each rule needs all of 'classes' in one frame; optional keys:
+    #   'severity', 'message'
+    #   'min_confidence' - ignore weaker detections for this rule
+    #   'max_distance'   - max pixels between the first class and each other class
+    #   'cameras'        - only apply on these camera IDs
+    #   'telegram'       - send Telegram alerts (default True)
+    THREAT_RULES = None
+    
+    # Threat persistence: a threat must appear in K of the last M detection frames
+    THREAT_FRAMES_REQUIRED = 3      # K
+    THREAT_FRAMES_WINDOW = 5        # M
+    
     # ============================================
     # CAMERA CONFIGURATION
     # ============================================
     CAMERA_INDEX = 0
     CAMERA_WIDTH = 640
     CAMERA_HEIGHT = 480
-    ESTIMATED_FPS = 8 # Reduced to match actual YOLO processing speed
     
     # Camera Names and Locations
+    # Every camera listed here is opened at startup. Add 'source' to use a
+    # different device index or a stream URL, e.g. 'rtsp://...'
+    # Add 'motion_mask' to ignore zones for the motion gate (trees, roads):
+    # a list of polygons in normalised coordinates, e.g. [[[0, 0], [1, 0], [1, 0.2], [0, 0.2]]]
     CAMERAS = {
         0: {'name': 'School Entrance', 'location': 'Front Gate'},
         1: {'name': 'Back Hallway', 'location': 'Building A'},
@@ -41,18 +97,64 @@ class Config:
         7: {'name': 'Playground', 'location': 'East Side'}
     }
     
+    # Detection overlays per output (False = raw camera frames)
+    ANNOTATE_STREAM = True
+    ANNOTATE_RECORDINGS = True
+    ANNOTATE_SNAPSHOTS = True
+    
+    # MJPEG stream tiers: each frame is encoded once per watched tier.
+    # Clients pick one with /video_feed/<id>?tier=thumb or ?width=320
+    STREAM_TIERS = {
+        'full': {'width': None, 'quality': 90},
+        'medium': {'width': 480, 'quality': 75},
+        'thumb': {'width': 320, 'quality': 60}
+    }
+    DEFAULT_STREAM_TIER = 'full'
+    
+    # JPEG encoder: 'auto' uses simplejpeg or PyTurboJPEG (libjpeg-turbo)
+    # when installed, otherwise OpenCV
+    JPEG_ENCODER = 'auto'
+    JPEG_SUBSAMPLING = '420'   # '444', '422' or '420'
+    JPEG_FAST_DCT = True
+    
     # ============================================
     # FORENSIC RECORDING CONFIGURATION
     # ============================================
     PRE_EVENT_SECONDS = 5   # Seconds to record BEFORE detection
     POST_EVENT_SECONDS = 5  # Seconds to record AFTER detection
+    RECORD_FPS = 15         # Clip frame rate (camera frames are sampled down to it)
     COOLDOWN_SECONDS = 5    # Cooldown between alerts
     
+    # Pre-event buffer storage: 'jpeg' keeps compressed frames (~10x less RAM),
+    # 'raw' keeps full BGR frame copies, 'array' keeps BGR frames in one
+    # preallocated array (no per-frame allocation, no decode on alert)
+    PRE_EVENT_BUFFER_MODE = 'jpeg'
+    PRE_EVENT_JPEG_QUALITY = 90
+    
+    # Continuous (DVR) recording: rolling segments on disk per camera.
+    # Alert clips are cut from segments instead of the RAM pre-event buffer
+    CONTINUOUS_RECORDING = False
+    SEGMENT_SECONDS = 10    # Clips start at a segment boundary (up to this much extra pre-event)
+    SEGMENT_RETENTION_MINUTES = 60
+    
+    # ============================================
+    # DETECTION LOG
+    # ============================================
+    DETECTION_LOG_SIZE = 200    # Entries kept for /logs and the dashboards
+    
+    # ============================================
+    # DATABASE
+    # ============================================
+    DATABASE_PATH = 'database/alerts.db'
+    DB_WRITE_BATCH_SIZE = 50        # Queued alert writes that trigger a commit
+    DB_WRITE_FLUSH_INTERVAL = 0.5   # Max seconds a queued write waits
+    
     # ============================================
     # FOLDER CONFIGURATION
     # ============================================
     BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     ALERT_VIDEO_FOLDER = os.path.join(BASE_DIR, 'storage', 'alerts')
+    SEGMENT_FOLDER = os.path.join(BASE_DIR, 'storage', 'segments')
     STATIC_FOLDER = os.path.join(BASE_DIR, '..', 'frontend', 'static')
     
     # ============================================
@@ -65,6 +167,7 @@ class Config:
         """Initialize application with configuration"""
         # Create required directories
         os.makedirs(Config.ALERT_VIDEO_FOLDER, exist_ok=True)
+        os.makedirs(Config.SEGMENT_FOLDER, exist_ok=True)
         os.makedirs(Config.STATIC_FOLDER, exist_ok=True)
         
         print("✅ Configuration loaded successfully")
@@ -11,14 +11,8 @@ import threading
 import time
 from datetime import datetime
 
-from app.services.threat_logic import ThreatLogic
 from app.services.telegram_service import TelegramService
-
-
-# Global state management
-detection_logs = []
-active_threat = False
-threat_lock = threading.Lock()
+from app.services.threat_logic import ThreatLogic
 
 
 def register_routes(app):
@@ -27,9 +21,16 @@ def register_routes(app):
     # Initialize Telegram service
     telegram_service = TelegramService(
         bot_token=app.config['TELEGRAM_BOT_TOKEN'],
-        chat_id=app.config['CHAT_ID']
+        chat_id=app.config['CHAT_ID'],
+        jpeg_encoder=getattr(app, 'jpeg_encoder', None)
     )
     
+    # Route threat detections from every camera pipeline through the shared handler
+    def on_threat(camera_id, frame, threat_type):
+        handle_threat_detection(app, camera_id, frame, threat_type, telegram_service)
+    
+    app.camera_manager.set_threat_handler(on_threat)
+    
     # ============================================
     # PAGE ROUTES
     # ============================================
@@ -47,7 +48,12 @@ def register_routes(app):
     @app.route('/alerts')
     def alerts_page():
         """Serve alerts log page"""
-        return render_template('alerts.html')
+        return render_template(
+            'alerts.html',
+            threat_rules=(ThreatLogic.DEFAULT_RULES if app.config['THREAT_RULES'] is None
+                          else app.config['THREAT_RULES']),
+            cameras=app.config['CAMERAS']
+        )
     
     @app.route('/gallery')
     def gallery():
@@ -59,18 +65,43 @@ def register_routes(app):
     # VIDEO STREAMING
     # ============================================
     
+    def stream_response(mode, camera_id):
+        """Build MJPEG response for the tier picked by ?tier= or ?width="""
+        channel = app.camera_manager.get(camera_id)
+        if channel is None:
+            return "Camera not available", 404
+        
+        tier = channel.pipeline.resolve_tier(
+            tier=request.args.get('tier'),
+            width=request.args.get('width', type=int)
+        )
+        if tier is None:
+            return "Unknown stream tier", 400
+        
+        return Response(
+            generate_frames(app, mode, camera_id, tier),
+            mimetype='multipart/x-mixed-replace; boundary=frame'
+        )
+    
     @app.route('/video_feed/<mode>')
     def video_feed(mode):
         """
         MJPEG video stream endpoint
         
         Args:
-            mode (str): 'camera' for live feed
+            mode (str): 'camera' for live feed (optional ?camera=<id>, ?tier=, ?width=)
         """
-        return Response(
-            generate_frames(app, mode),
-            mimetype='multipart/x-mixed-replace; boundary=frame'
-        )
+        return stream_response(mode, request.args.get('camera', type=int))
+    
+    @app.route('/video_feed/<int:camera_id>')
+    def camera_video_feed(camera_id):
+        """
+        MJPEG video stream endpoint for a specific camera
+        
+        Args:
+            camera_id (int): Camera ID from Config.CAMERAS (optional ?tier=, ?width=)
+        """
+        return stream_response('camera', camera_id)
     
     # ============================================
     # API ENDPOINTS
@@ -78,14 +109,68 @@ def register_routes(app):
     
     @app.route('/logs')
     def get_logs():
-        """Get detection logs as JSON"""
-        return jsonify({'logs': detection_logs})
+        """
+        Get detection logs as JSON
+        
+        Query: ?since=<sequence> returns only newer entries, ?camera=<id>
+        filters by camera. Responses carry an ETag; a matching If-None-Match
+        gets 304 Not Modified.
+        """
+        detection_log = app.detection_log
+        etag = detection_log.get_etag()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        since = request.args.get('since', 0, type=int)
+        camera_id = request.args.get('camera', type=int)
+        entries, last_sequence, complete = detection_log.entries_since(since, camera_id)
+        
+        response = jsonify({
+            'logs': [entry.to_dict() for entry in entries],
+            'last_sequence': last_sequence,
+            'complete': complete
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     @app.route('/threat_status')
     def threat_status():
-        """Check if there's an active threat (for audio alarm)"""
-        with threat_lock:
-            return jsonify({'active_threat': active_threat})
+        """Check if there's an active threat on any camera (for audio alarm)"""
+        return jsonify(app.camera_manager.get_threat_status())
+    
+    @app.route('/events')
+    def events():
+        """
+        Server-Sent Events: new log entries and threat state changes
+        
+        Resumes after the Last-Event-ID header (sent by EventSource on
+        reconnect) or ?since=<sequence>.
+        """
+        since = request.headers.get('Last-Event-ID', type=int)
+        if since is None:
+            since = request.args.get('since', 0, type=int)
+        
+        return Response(
+            generate_events(app, since),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    @app.route('/api/cameras')
+    def list_cameras():
+        """Get status of all live cameras"""
+        return jsonify(app.camera_manager.get_status())
+    
+    @app.route('/api/pipeline/status')
+    def pipeline_status():
+        """Get vision pipeline status (optional ?camera=<id>)"""
+        channel = app.camera_manager.get(request.args.get('camera', type=int))
+        if channel is None:
+            return jsonify({'error': 'Camera not available'}), 404
+        return jsonify(channel.pipeline.get_status())
     
     @app.route('/api/alerts/count')
     def alerts_count():
@@ -114,11 +199,43 @@ def register_routes(app):
     
     @app.route('/api/alerts')
     def all_alerts():
-        """Get all alerts with filtering"""
-        if hasattr(app, 'database_service'):
-            alerts = app.database_service.get_all_alerts()
-            return jsonify({'alerts': alerts, 'total': len(alerts)})
-        return jsonify({'alerts': [], 'total': 0})
+        """
+        Get one page of alerts with filtering (newest first)
+        
+        Query: ?limit= (max 500), ?before_id= (last ID of the previous page),
+        ?after_ts= / ?until_ts= ('YYYY-MM-DD HH:MM:SS', UTC), ?camera=,
+        ?threat_type=, ?severity=, ?with_total=1 (also count every alert matching
+        the filters; costs a scan, so request it with the first page only)
+        """
+        if not hasattr(app, 'database_service'):
+            return jsonify({'alerts': [], 'count': 0, 'next_before_id': None})
+        
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        filters = {
+            'after_ts': request.args.get('after_ts') or None,
+            'until_ts': request.args.get('until_ts') or None,
+            'camera_id': request.args.get('camera', type=int),
+            'threat_type': request.args.get('threat_type') or None,
+            'severity': request.args.get('severity') or None
+        }
+        try:
+            alerts = app.database_service.query_alerts(
+                limit=limit,
+                before_id=request.args.get('before_id', type=int),
+                **filters
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        page = {
+            'alerts': alerts,
+            'count': len(alerts),
+            # Cursor for the next page (None on the last page)
+            'next_before_id': alerts[-1]['id'] if len(alerts) == limit else None
+        }
+        if request.args.get('with_total') == '1':
+            page['total'] = app.database_service.get_alerts_count(**filters)['total']
+        return jsonify(page)
     
     @app.route('/api/alerts/<int:alert_id>', methods=['DELETE'])
     def delete_alert(alert_id):
@@ -128,25 +245,15 @@ def register_routes(app):
                 return jsonify({'error': 'Database service not available'}), 500
             
             # Get alert info first to find video path
-            alerts = app.database_service.get_all_alerts()
-            alert = next((a for a in alerts if a['id'] == alert_id), None)
+            alert = app.database_service.get_alert(alert_id)
             
             if not alert:
                 return jsonify({'error': 'Alert not found'}), 404
             
-            # Delete video file if exists
-            if alert.get('video_path'):
-                try:
-                    video_filename = alert['video_path'].split('/')[-1]
-                    video_path = os.path.join(app.config['ALERT_VIDEO_FOLDER'], video_filename)
-                    if os.path.exists(video_path):
-                        os.remove(video_path)
-                        print(f"🗑️ Deleted video: {video_filename}")
-                except Exception as e:
-                    print(f"⚠️ Error deleting video file: {e}")
-            
-            # Delete alert from database
+            # Delete alert from database, video file in the background
             app.database_service.delete_alert(alert_id)
+            if alert.get('video_path'):
+                app.video_janitor.submit([alert['video_path']])
             
             return jsonify({
                 'success': True,
@@ -156,44 +263,82 @@ def register_routes(app):
             print(f"❌ Error deleting alert: {e}")
             return jsonify({'error': str(e)}), 500
     
-    @app.route('/api/alerts/clear', methods=['DELETE'])
-    def clear_all_alerts():
-        """Delete all alerts and their associated videos"""
+    @app.route('/api/alerts/bulk_delete', methods=['POST'])
+    def bulk_delete_alerts():
+        """
+        Delete many alerts in one transaction
+        
+        JSON body: {'ids': [...]} and/or {'after_ts': ..., 'until_ts': ...}
+        ('YYYY-MM-DD HH:MM:SS', UTC). Videos are removed in the background;
+        poll /api/alerts/cleanup/<job_id> for progress.
+        """
         try:
             if not hasattr(app, 'database_service'):
                 return jsonify({'error': 'Database service not available'}), 500
             
-            # Get all alerts first
-            alerts = app.database_service.get_all_alerts()
-            deleted_videos = 0
+            data = request.get_json(silent=True) or {}
+            alert_ids = data.get('ids')
+            if alert_ids is not None and not (
+                isinstance(alert_ids, list) and
+                all(isinstance(alert_id, int) and not isinstance(alert_id, bool) for alert_id in alert_ids)
+            ):
+                return jsonify({'error': 'ids must be a list of integers'}), 400
             
-            # Delete all video files
-            for alert in alerts:
-                if alert.get('video_path'):
-                    try:
-                        video_filename = alert['video_path'].split('/')[-1]
-                        video_path = os.path.join(app.config['ALERT_VIDEO_FOLDER'], video_filename)
-                        if os.path.exists(video_path):
-                            os.remove(video_path)
-                            deleted_videos += 1
-                    except Exception as e:
-                        print(f"⚠️ Error deleting video file: {e}")
+            try:
+                deleted, video_paths = app.database_service.delete_alerts(
+                    alert_ids=alert_ids,
+                    after_ts=data.get('after_ts'),
+                    until_ts=data.get('until_ts')
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
-            # Clear all alerts from database
-            app.database_service.clear_all_alerts()
+            cleanup = app.video_janitor.submit(video_paths)
+            return jsonify({
+                'success': True,
+                'message': f'Deleted {deleted} alerts, removing {len(video_paths)} videos in the background',
+                'deleted_alerts': deleted,
+                'cleanup': cleanup
+            })
+        except Exception as e:
+            print(f"❌ Error deleting alerts: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/alerts/clear', methods=['DELETE'])
+    def clear_all_alerts():
+        """Delete all alerts; their videos are removed in the background"""
+        try:
+            if not hasattr(app, 'database_service'):
+                return jsonify({'error': 'Database service not available'}), 500
+            
+            deleted, video_paths = app.database_service.clear_all_alerts()
+            cleanup = app.video_janitor.submit(video_paths)
             
-            print(f"🗑️ Cleared {len(alerts)} alerts and {deleted_videos} videos")
+            print(f"🗑️ Cleared {deleted} alerts, {len(video_paths)} videos queued for removal")
             
             return jsonify({
                 'success': True,
-                'message': f'Deleted {len(alerts)} alerts and {deleted_videos} videos',
-                'deleted_alerts': len(alerts),
-                'deleted_videos': deleted_videos
+                'message': f'Deleted {deleted} alerts, removing {len(video_paths)} videos in the background',
+                'deleted_alerts': deleted,
+                'cleanup': cleanup
             })
         except Exception as e:
             print(f"❌ Error clearing alerts: {e}")
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/alerts/cleanup')
+    def cleanup_status():
+        """Progress of recent video cleanup jobs"""
+        return jsonify(app.video_janitor.get_status())
+    
+    @app.route('/api/alerts/cleanup/<int:job_id>')
+    def cleanup_job(job_id):
+        """Progress of one video cleanup job"""
+        job = app.video_janitor.get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Cleanup job not found'}), 404
+        return jsonify(job)
+    
     @app.route('/api/cameras/detect')
     def detect_cameras():
         """Detect available cameras by testing indices 0-5"""
@@ -233,7 +378,7 @@ def register_routes(app):
                 'success': True,
                 'cameras': available_cameras,
                 'count': len(available_cameras),
-                'current_index': app.camera_service.camera_index if hasattr(app, 'camera_service') else 0
+                'current_index': app.camera_manager.get_default().camera_service.camera_index
             })
             
         except Exception as e:
@@ -250,11 +395,13 @@ def register_routes(app):
             if new_index is None:
                 return jsonify({'error': 'Camera index not provided'}), 400
             
-            if not hasattr(app, 'camera_service'):
+            # Re-point the given camera (default camera if not specified)
+            channel = app.camera_manager.get(data.get('camera_id'))
+            if channel is None:
                 return jsonify({'error': 'Camera service not available'}), 500
             
             # Attempt to switch camera
-            success = app.camera_service.switch_camera(new_index)
+            success = channel.camera_service.switch_camera(new_index)
             
             if success:
                 return jsonify({
@@ -348,112 +495,112 @@ def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
-def generate_frames(app, source='camera'):
+def generate_frames(app, source='camera', camera_id=None, tier=None):
     """
     Generate video frames for MJPEG streaming
     
+    Frames are produced once by the camera's vision pipeline and
+    fanned out to every connected viewer.
+    
     Args:
         app: Flask application instance
         source (str): 'camera' for live feed
+        camera_id (int): Camera ID, or None for the default camera
+        tier (str): Stream tier name, or None for the default tier
     """
-    global active_threat, detection_logs
+    if source != 'camera':
+        return
     
-    yolo_service = app.yolo_service
-    camera_service = app.camera_service
-    recorder_service = app.recorder_service
+    pipeline = app.camera_manager.get(camera_id).pipeline
     
+    for frame_bytes in pipeline.subscribe(tier):
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
-    # Camera mode (existing logic)
+
+def generate_events(app, since=0, keepalive=15.0):
+    """
+    Generate Server-Sent Events for one browser
+    
+    Args:
+        app: Flask application instance
+        since (int): Last event sequence the browser has seen
+        keepalive (float): Seconds between keep-alive comments when idle
+    """
+    event_stream = app.event_stream
+    
+    text, since = event_stream.resume(since, app.camera_manager.get_threat_status())
+    yield text
+    
     while True:
-        if source == 'camera':
-            # Read from camera
-            success, frame = camera_service.read_frame()
-            
-            if not success:
-                continue
-            
-            # Run YOLO inference
-            results = yolo_service.run_inference(frame)
-            detections = yolo_service.get_detections(results)
-            annotated_frame = yolo_service.annotate_frame(results)
-            
-            # Add to ring buffer
-            recorder_service.add_frame_to_buffer(annotated_frame)
-            
-            # Check for threats
-            is_threat, threat_type = ThreatLogic.check_threat_conditions(detections)
-            
-            if is_threat:
-                handle_threat_detection(
-                    app,
-                    annotated_frame,
-                    threat_type,
-                    yolo_service,
-                    camera_service,
-                    recorder_service,
-                    TelegramService(app.config['TELEGRAM_BOT_TOKEN'], app.config['CHAT_ID'])
-                )
-            
-            # Encode and yield frame
-            _, buffer = cv2.imencode('.jpg', annotated_frame)
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+        new_events, complete = event_stream.wait_for_events(since, keepalive)
+        if not new_events:
+            yield ": keepalive\n\n"
+            continue
+        
+        if not complete:
+            yield "event: reset\ndata: {}\n\n"
+        yield "".join(event.to_sse() for event in new_events)
+        since = new_events[-1].sequence
 
 
-def handle_threat_detection(app, frame, threat_type, yolo_service, camera_service, recorder_service, telegram_service):
-    """Handle threat detection"""
-    global active_threat, detection_logs
+def handle_threat_detection(app, camera_id, frame, threat_type, telegram_service):
+    """Handle threat detection on a camera"""
+    camera_manager = app.camera_manager
+    channel = camera_manager.get(camera_id)
+    recorder_service = channel.recorder_service
     
     # Check if we can record
     if not recorder_service.can_record():
-        if recorder_service.is_recording:
-            print("⏳ Already recording alert video, skipping...")
+        if recorder_service.extend_recording():
+            print(f"⏳ Already recording on camera {camera_id}, extending clip...")
+        elif recorder_service.is_recording:
+            print(f"⏳ Already recording alert video on camera {camera_id}, skipping...")
         else:
-            print("⏳ Cooldown active, skipping alert...")
+            print(f"⏳ Cooldown active on camera {camera_id}, skipping alert...")
         return
     
     # Set threat flag
-    with threat_lock:
-        active_threat = True
-    
-    # Log the threat
-    timestamp = datetime.now().strftime('%H:%M:%S')
-    log_entry = f"[{timestamp}] 🚨 Threat Detected: {threat_type}"
-    detection_logs.append(log_entry)
-    
-    if len(detection_logs) > 50:
-        detection_logs.pop(0)
+    camera_manager.set_threat_active(camera_id, True)
+    
+    # Log the threat (pushed to browsers through the event stream)
+    threat_logic = channel.pipeline.threat_logic
+    class_name, confidence = threat_logic.get_threat_detection(channel.pipeline.last_detections, threat_type)
+    app.detection_log.add(camera_id, channel.name, threat_type, class_name, confidence)
+    
+    # Queue the alert now (write-behind, never blocks this vision thread);
+    # Telegram and the recording fill in its status when they finish
+    database_service = getattr(app, 'database_service', None)
+    alert = None
+    if database_service is not None:
+        alert = database_service.queue_alert(
+            threat_type=threat_type,
+            camera_id=camera_id,
+            severity=threat_logic.get_threat_severity(threat_type),
+            status='Recording'
+        )
     
     # Send Telegram photo alert (non-blocking)
-    threading.Thread(
-        target=telegram_service.send_photo_alert,
-        args=(frame.copy(), threat_type),
-        daemon=True
-    ).start()
+    if threat_logic.should_send_telegram_alert(threat_type):
+        snapshot = frame.copy()
+        
+        def send_telegram():
+            sent = telegram_service.send_photo_alert(snapshot, threat_type, channel.name)
+            if sent and alert is not None:
+                database_service.queue_update(alert, telegram_sent=True)
+        
+        threading.Thread(target=send_telegram, daemon=True).start()
     
     # Start forensic video recording
     def record_video():
-        global active_threat
-        video_path = recorder_service.record_alert_video(threat_type, camera_service, yolo_service)
+        video_path = recorder_service.record_alert_video(threat_type, channel.pipeline)
         
-        # Save alert to database
-        if video_path and hasattr(app, 'database_service'):
-            try:
-                app.database_service.add_alert(
-                    threat_type=threat_type,
-                    camera_id=0,
-                    video_path=video_path,
-                    telegram_sent=True
-                )
-                print(f"💾 Alert saved to database: {threat_type}")
-
-            except Exception as e:
-                print(f"❌ Error saving alert to database: {e}")
+        if alert is not None:
+            if video_path:
+                database_service.queue_update(alert, video_path=video_path, status='Recorded')
+            else:
+                database_service.queue_update(alert, status='No Video')
         
-        with threat_lock:
-            active_threat = False
+        camera_manager.set_threat_active(camera_id, False)
     
     threading.Thread(target=record_video, daemon=True).start()
-
@@ -0,0 +1,111 @@
+"""
+Annotation Service - Detection Overlay Renderer
+Draws boxes and labels using per-class colours and text metrics computed once
+"""
+
+import cv2
+
+
+class FrameAnnotator:
+    """Renders detections onto frames with cached per-class drawing assets"""
+
+    # Box colours by (Turkish) class name, BGR
+    CLASS_COLORS = {
+        'Kar Maskesi': (0, 0, 255),     # Red
+        'Silah': (0, 0, 255),           # Red
+        'Bicak': (0, 0, 255),           # Red
+        'Para': (0, 255, 255),          # Yellow
+        'Insan': (0, 255, 0),           # Green
+        'Telefon': (255, 255, 0)        # Cyan
+    }
+    DEFAULT_COLOR = (255, 0, 0)
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    FONT_SCALE = 0.6
+    FONT_THICKNESS = 2
+    TEXT_COLOR = (255, 255, 255)
+
+    def __init__(self, class_names):
+        """
+        Initialize annotator and precompute drawing assets
+
+        Args:
+            class_names (dict): Class ID → display name
+        """
+        self.class_names = class_names
+        self.assets = {}
+
+        for cls_id, name in class_names.items():
+            self.assets[cls_id] = self._build_assets(cls_id, name)
+
+    def _build_assets(self, cls_id, name):
+        """
+        Build colour and label metrics for one class
+
+        Label width is measured with a placeholder score; Hershey digits
+        share one advance width, so it holds for every confidence value.
+        """
+        (text_width, text_height), _ = cv2.getTextSize(
+            f"{name} 0.00", self.FONT, self.FONT_SCALE, self.FONT_THICKNESS
+        )
+        return {
+            'name': name,
+            'color': self.CLASS_COLORS.get(name, self.DEFAULT_COLOR),
+            'text_width': text_width,
+            'text_height': text_height
+        }
+
+    def _get_assets(self, cls_id):
+        """Get cached assets, building them for classes unknown at startup"""
+        assets = self.assets.get(cls_id)
+        if assets is None:
+            assets = self._build_assets(cls_id, self.class_names.get(cls_id, f"Class {cls_id}"))
+            self.assets[cls_id] = assets
+        return assets
+
+    def render(self, frame, detections):
+        """
+        Draw detections onto frame in place
+
+        Args:
+            frame: BGR frame (numpy array), modified in place
+            detections (Detections): Frame detections
+
+        Returns:
+            numpy array: The same frame, annotated
+        """
+        if len(detections) == 0:
+            return frame
+
+        boxes = detections.xyxy.astype(int).tolist()
+        class_ids = detections.class_id.tolist()
+        confidences = detections.confidence.tolist()
+
+        for (x1, y1, x2, y2), cls_id, confidence in zip(boxes, class_ids, confidences):
+            assets = self._get_assets(cls_id)
+            color = assets['color']
+
+            # Box
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+            # Label background
+            cv2.rectangle(
+                frame,
+                (x1, y1 - assets['text_height'] - 10),
+                (x1 + assets['text_width'] + 5, y1),
+                color,
+                -1
+            )
+
+            # Label text
+            cv2.putText(
+                frame,
+                f"{assets['name']} {confidence:.2f}",
+                (x1 + 2, y1 - 5),
+                self.FONT,
+                self.FONT_SCALE,
+                self.TEXT_COLOR,
+                self.FONT_THICKNESS
+            )
+
+        return frame
@@ -0,0 +1,189 @@
+"""
+Batch Inference Service - Multi-Camera Batching
+Collects the latest frame from every camera pipeline into one batched forward pass
+"""
+
+import threading
+import time
+
+
+class BatchRequest:
+    """A single frame waiting for batched inference"""
+
+    def __init__(self, frame):
+        """
+        Initialize request
+
+        Args:
+            frame: Input image frame (numpy array)
+        """
+        self.frame = frame
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class BatchInferenceService:
+    """
+    Groups concurrent inference requests into batches
+
+    Each camera pipeline calls run_inference() as usual. Requests are held
+    until either max_batch_size frames are pending, every expected camera
+    has submitted a frame, or max_wait seconds have passed since the first
+    request of the batch - then one batched pass serves all of them.
+    """
+
+    def __init__(self, yolo_service, max_batch_size=8, max_wait=0.02,
+                 inference_size=None, conf_threshold=0.15, request_timeout=30):
+        """
+        Initialize batch inference service
+
+        Args:
+            yolo_service: YOLO service instance
+            max_batch_size (int): Maximum frames per forward pass
+            max_wait (float): Maximum seconds to wait for a batch to fill
+            inference_size (int): Size for inference (default: the YOLO service's)
+            conf_threshold (float): Confidence threshold
+            request_timeout (float): Seconds to wait for a batch result
+        """
+        self.yolo_service = yolo_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.inference_size = inference_size or yolo_service.inference_size
+        self.conf_threshold = conf_threshold
+        self.request_timeout = request_timeout
+
+        # Number of pipelines feeding this service (dispatch early once all arrived)
+        self.expected_sources = self.max_batch_size
+
+        self.pending = []
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_run = 0
+
+    def set_expected_sources(self, count):
+        """Set how many pipelines submit frames (caps the batch wait)"""
+        with self.condition:
+            self.expected_sources = max(1, min(count, self.max_batch_size))
+
+    def start(self):
+        """Start the batching worker thread"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"✅ Batch inference started (max batch: {self.max_batch_size}, "
+              f"max wait: {self.max_wait * 1000:.0f} ms)")
+
+    def stop(self, timeout=2.0):
+        """Stop the worker and fail any pending requests"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+        with self.condition:
+            pending, self.pending = self.pending, []
+        for request in pending:
+            request.error = RuntimeError("Batch inference stopped")
+            request.done.set()
+
+    def run_inference(self, frame):
+        """
+        Submit a frame and block until its batch has been processed
+
+        Args:
+            frame: Input image frame (numpy array)
+
+        Returns:
+            YOLO Results list for this frame
+        """
+        if not self.running:
+            return self.yolo_service.run_inference(
+                frame, inference_size=self.inference_size, conf_threshold=self.conf_threshold
+            )
+
+        request = BatchRequest(frame)
+        with self.condition:
+            # stop() may have drained pending since the check above
+            if not self.running:
+                raise RuntimeError("Batch inference stopped")
+            self.pending.append(request)
+            self.condition.notify_all()
+
+        if not request.done.wait(self.request_timeout):
+            with self.condition:
+                if request in self.pending:
+                    self.pending.remove(request)
+            raise RuntimeError(f"Batch inference timed out after {self.request_timeout}s")
+
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _collect_batch(self):
+        """Wait for pending requests and take up to max_batch_size of them"""
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait(0.5)
+
+            if not self.running:
+                return []
+
+            deadline = time.time() + self.max_wait
+            while self.running and len(self.pending) < self.expected_sources:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            batch = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        """Worker loop: collect → batched forward pass → hand results back"""
+        while self.running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            try:
+                results = self.yolo_service.run_batch(
+                    [request.frame for request in batch],
+                    inference_size=self.inference_size,
+                    conf_threshold=self.conf_threshold
+                )
+                for request, frame_results in zip(batch, results):
+                    request.results = frame_results
+            except Exception as e:
+                print(f"❌ Batch inference error: {e}")
+                for request in batch:
+                    request.error = e
+
+            self.batches_run += 1
+            self.frames_run += len(batch)
+
+            for request in batch:
+                request.done.set()
+
+    def get_status(self):
+        """Get batching statistics"""
+        return {
+            'running': self.running,
+            'max_batch_size': self.max_batch_size,
+            'max_wait': self.max_wait,
+            'expected_sources': self.expected_sources,
+            'batches_run': self.batches_run,
+            'frames_run': self.frames_run,
+            'avg_batch_size': (self.frames_run / self.batches_run) if self.batches_run else 0
+        }
@@ -0,0 +1,291 @@
+"""
+Camera Manager - Multi-Camera Registry
+Owns the capture, recording and pipeline services for every configured camera
+"""
+
+import threading
+
+from app.services.camera_service import CameraService
+from app.services.recorder_service import RecorderService
+from app.services.pipeline_service import VisionPipeline
+from app.services.segment_recorder import SegmentRecorder
+from app.services.inference_scheduler import InferenceScheduler
+from app.services.motion_detector import MotionDetector
+from app.services.tracker_service import ObjectTracker
+from app.services.threat_logic import ThreatLogic, ThreatPersistence
+
+
+class CameraChannel:
+    """Services and threat state belonging to a single camera"""
+
+    def __init__(self, camera_id, name, location, camera_service, recorder_service, pipeline,
+                 segment_recorder=None):
+        """
+        Initialize camera channel
+
+        Args:
+            camera_id (int): Camera ID from Config.CAMERAS
+            name (str): Human-readable camera name
+            location (str): Camera location
+            camera_service: Camera service instance
+            recorder_service: Recorder service instance
+            pipeline: Vision pipeline instance
+            segment_recorder: Continuous segment recorder, or None
+        """
+        self.camera_id = camera_id
+        self.name = name
+        self.location = location
+        self.camera_service = camera_service
+        self.recorder_service = recorder_service
+        self.pipeline = pipeline
+        self.segment_recorder = segment_recorder
+        self.active_threat = False
+
+    def get_status(self):
+        """Get channel status"""
+        return {
+            'id': self.camera_id,
+            'name': self.name,
+            'location': self.location,
+            'online': self.camera_service.is_opened(),
+            'active_threat': self.active_threat,
+            'pipeline': self.pipeline.get_status(),
+            'buffer': self.recorder_service.get_buffer_status(),
+            'continuous_recording': self.segment_recorder.get_status() if self.segment_recorder else None
+        }
+
+
+class CameraManager:
+    """Registry of all live cameras"""
+
+    def __init__(self, cameras, yolo_service, width=640, height=480,
+                 alert_folder='storage/alerts', pre_event_seconds=5,
+                 post_event_seconds=5, record_fps=15, default_camera=0,
+                 inference_service=None, buffer_mode='raw', buffer_jpeg_quality=90,
+                 segment_folder=None, segment_seconds=10, segment_retention_seconds=3600,
+                 annotate_stream=True, annotate_recordings=True, annotate_snapshots=True,
+                 stream_tiers=None, default_stream_tier=None, jpeg_encoder=None,
+                 detection_active_fps=8, detection_idle_fps=2, detection_every_n_frames=None,
+                 detection_active_hold_seconds=5, motion_gating=False, motion_settings=None,
+                 tracking=True, tracker_settings=None, threat_frames_required=1, threat_frames_window=1,
+                 threat_rules=None, event_stream=None):
+        """
+        Initialize camera manager and open every configured camera
+
+        Args:
+            cameras (dict): Camera definitions ({id: {'name', 'location', 'source'}})
+            yolo_service: Shared YOLO service instance
+            width (int): Frame width
+            height (int): Frame height
+            alert_folder (str): Folder to save alert videos
+            pre_event_seconds (int): Seconds to record before event
+            post_event_seconds (int): Seconds to record after event
+            record_fps (int): Frame rate of alert clips and continuous recording segments
+            default_camera (int): Camera used when a request does not specify one
+            inference_service: Optional BatchInferenceService or InferencePool shared by all pipelines
+            buffer_mode (str): Pre-event buffer storage: 'raw' (BGR frame copies), 'jpeg'
+                               (encoded JPEG bytes) or 'array' (one preallocated array)
+            buffer_jpeg_quality (int): JPEG quality for the pre-event buffer
+            segment_folder (str): Enables continuous recording into this folder
+            segment_seconds (int): Continuous recording segment length
+            segment_retention_seconds (int): How long segments are kept
+            annotate_stream (bool): Draw detections on the MJPEG stream
+            annotate_recordings (bool): Draw detections on recorded video
+            annotate_snapshots (bool): Draw detections on Telegram snapshots
+            stream_tiers (dict): MJPEG resolution/quality tiers
+            default_stream_tier (str): Tier used when a client does not pick one
+            jpeg_encoder (JpegEncoder): JPEG encoder shared by all cameras
+            detection_active_fps (float): Detection rate while people are in view
+            detection_idle_fps (float): Detection rate for an empty scene
+            detection_every_n_frames (int): If set, detect every Nth frame instead
+            detection_active_hold_seconds (float): Keep the active rate this long after activity
+            motion_gating (bool): Skip detection while a camera's scene is static
+            motion_settings (dict): MotionDetector keyword arguments (per-camera
+                                    masks come from the camera's 'motion_mask')
+            tracking (bool): Track objects across frames and interpolate boxes
+            tracker_settings (dict): ObjectTracker keyword arguments
+            threat_frames_required (int): Detection frames (K) that must show a threat
+            threat_frames_window (int): Recent detection frames (M) considered
+            threat_rules (list): Threat rule definitions (default: ThreatLogic.DEFAULT_RULES)
+            event_stream (EventStream): Receives a 'threat' event on every threat state change
+        """
+        self.yolo_service = yolo_service
+        self.inference_service = inference_service
+        self.channels = {}
+        self.threat_lock = threading.Lock()
+        self.threat_handler = None
+        self.event_stream = event_stream
+
+        for camera_id, info in cameras.items():
+            source = info.get('source', camera_id)
+
+            try:
+                camera_service = CameraService(camera_index=source, width=width, height=height)
+            except Exception as e:
+                print(f"⚠️ Camera {camera_id} ({info.get('name')}) unavailable: {e}")
+                continue
+
+            recorder_service = RecorderService(
+                alert_folder=alert_folder,
+                pre_event_seconds=pre_event_seconds,
+                post_event_seconds=post_event_seconds,
+                record_fps=record_fps,
+                camera_id=camera_id,
+                buffer_mode=buffer_mode,
+                jpeg_quality=buffer_jpeg_quality,
+                jpeg_encoder=jpeg_encoder
+            )
+
+            motion_detector = None
+            if motion_gating:
+                motion_detector = MotionDetector(mask=info.get('motion_mask'), **(motion_settings or {}))
+
+            pipeline = VisionPipeline(
+                camera_service,
+                yolo_service,
+                recorder_service,
+                threat_handler=self._make_threat_handler(camera_id),
+                camera_id=camera_id,
+                inference_service=inference_service,
+                annotate_stream=annotate_stream,
+                annotate_recordings=annotate_recordings,
+                annotate_snapshots=annotate_snapshots,
+                stream_tiers=stream_tiers,
+                default_tier=default_stream_tier,
+                jpeg_encoder=jpeg_encoder,
+                scheduler=InferenceScheduler(
+                    active_fps=detection_active_fps,
+                    idle_fps=detection_idle_fps,
+                    every_n_frames=detection_every_n_frames,
+                    active_hold_seconds=detection_active_hold_seconds
+                ),
+                motion_detector=motion_detector,
+                tracker=ObjectTracker(**(tracker_settings or {})) if tracking else None,
+                threat_persistence=ThreatPersistence(
+                    required=threat_frames_required,
+                    window=threat_frames_window
+                ),
+                threat_logic=ThreatLogic(yolo_service.class_names, threat_rules, camera_id)
+            )
+
+            segment_recorder = None
+            if segment_folder:
+                segment_recorder = SegmentRecorder(
+                    pipeline,
+                    segment_folder,
+                    camera_id=camera_id,
+                    segment_seconds=segment_seconds,
+                    retention_seconds=segment_retention_seconds,
+                    fps=record_fps
+                )
+                recorder_service.attach_segment_recorder(segment_recorder)
+
+            self.channels[camera_id] = CameraChannel(
+                camera_id,
+                info.get('name', f"Camera {camera_id}"),
+                info.get('location', ''),
+                camera_service,
+                recorder_service,
+                pipeline,
+                segment_recorder
+            )
+
+        if default_camera in self.channels:
+            self.default_camera = default_camera
+        elif self.channels:
+            self.default_camera = next(iter(self.channels))
+        else:
+            raise RuntimeError("No configured camera could be opened")
+
+        if inference_service is not None:
+            inference_service.set_expected_sources(len(self.channels))
+
+        print(f"📹 Cameras online: {len(self.channels)}/{len(cameras)}")
+
+    def _make_threat_handler(self, camera_id):
+        """Bind a pipeline threat callback to its camera ID"""
+        def handler(frame, threat_type):
+            if self.threat_handler is not None:
+                self.threat_handler(camera_id, frame, threat_type)
+        return handler
+
+    def set_threat_handler(self, threat_handler):
+        """
+        Register callback for threats on any camera
+
+        Args:
+            threat_handler (callable): Called as threat_handler(camera_id, frame, threat_type)
+        """
+        self.threat_handler = threat_handler
+
+    def get(self, camera_id=None):
+        """
+        Get channel for a camera
+
+        Args:
+            camera_id (int): Camera ID, or None for the default camera
+
+        Returns:
+            CameraChannel: Channel, or None if the camera is not live
+        """
+        if camera_id is None:
+            camera_id = self.default_camera
+        return self.channels.get(camera_id)
+
+    def get_default(self):
+        """Get channel for the default camera"""
+        return self.channels[self.default_camera]
+
+    def start_all(self):
+        """Start the pipeline of every live camera"""
+        if self.inference_service is not None:
+            self.inference_service.start()
+        for channel in self.channels.values():
+            channel.pipeline.start()
+            if channel.segment_recorder is not None:
+                channel.segment_recorder.start()
+
+    def stop_all(self):
+        """Stop every pipeline and release every camera"""
+        # Release pipelines blocked on pending inference first
+        if self.inference_service is not None:
+            self.inference_service.stop()
+        for channel in self.channels.values():
+            channel.pipeline.stop()
+            if channel.segment_recorder is not None:
+                channel.segment_recorder.stop()
+        for channel in self.channels.values():
+            channel.camera_service.cleanup()
+
+    def set_threat_active(self, camera_id, active):
+        """Set threat flag for a camera (pushes a 'threat' event when it changes)"""
+        with self.threat_lock:
+            channel = self.channels.get(camera_id)
+            if channel is None or channel.active_threat == active:
+                return
+            channel.active_threat = active
+
+        if self.event_stream is not None:
+            self.event_stream.publish('threat', self.get_threat_status())
+
+    def get_threat_status(self):
+        """
+        Get threat flags for all cameras
+
+        Returns:
+            dict: {'active_threat': bool, 'cameras': {camera_id: bool}}
+        """
+        with self.threat_lock:
+            cameras = {cid: ch.active_threat for cid, ch in self.channels.items()}
+        return {
+            'active_threat': any(cameras.values()),
+            'cameras': cameras
+        }
+
+    def get_status(self):
+        """Get status for all cameras"""
+        return {
+            'default_camera': self.default_camera,
+            'inference': self.inference_service.get_status() if self.inference_service else None,
+            'cameras': [channel.get_status() for channel in self.channels.values()]
+        }
@@ -16,7 +16,7 @@ class CameraService:
         Initialize camera service
         
         Args:
-            camera_index (int): Camera device index
+            camera_index (int or str): Camera device index or stream URL
             width (int): Frame width
             height (int): Frame height
         """
@@ -25,12 +25,32 @@ class CameraService:
         self.height = height
         self.camera = None
         self.camera_lock = threading.Lock()
+        
+        # Latest-frame slot filled by the background capture thread
+        self.frame_condition = threading.Condition()
+        self.latest_frame = None
+        self.latest_sequence = 0
+        self.latest_timestamp = 0
+        self.latest_consumed = True
+        self.last_read_sequence = 0
+        
+        # Capture thread state and counters
+        self.capturing = False
+        self.capture_thread = None
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        
         self.initialize_camera()
     
     def initialize_camera(self):
         """Initialize and configure camera"""
         try:
-            self.camera = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
+            if isinstance(self.camera_index, int):
+                self.camera = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
+            else:
+                # Network stream (RTSP/HTTP) - let OpenCV pick the backend
+                self.camera = cv2.VideoCapture(self.camera_index)
             
             if not self.camera.isOpened():
                 raise RuntimeError(f"Failed to open camera at index {self.camera_index}")
@@ -61,10 +81,101 @@ class CameraService:
             print(f"❌ Camera initialization error: {e}")
             raise
     
+    def start_capture(self):
+        """
+        Start background capture thread
+        
+        The thread keeps draining the device into a single latest-frame
+        slot, so frames never queue up in the driver while consumers are busy.
+        """
+        if self.capturing:
+            return
+        
+        self.capturing = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        print(f"✅ Capture thread started (index: {self.camera_index})")
+    
+    def stop_capture(self, timeout=2.0):
+        """Stop background capture thread (timeout=None waits for its current read)"""
+        self.capturing = False
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout)
+            self.capture_thread = None
+    
+    def _capture_loop(self):
+        """Capture loop: read device → overwrite latest-frame slot"""
+        while self.capturing:
+            try:
+                success, frame = self._read_device()
+            except Exception as e:
+                print(f"❌ Capture error (index: {self.camera_index}): {e}")
+                success, frame = False, None
+            
+            if not success:
+                self.read_failures += 1
+                time.sleep(0.1)
+                continue
+            
+            with self.frame_condition:
+                # Previous frame was never picked up by a consumer
+                if not self.latest_consumed:
+                    self.frames_dropped += 1
+                
+                self.latest_frame = frame
+                self.latest_sequence += 1
+                self.latest_timestamp = time.time()
+                self.latest_consumed = False
+                self.frames_captured += 1
+                self.frame_condition.notify_all()
+    
+    def read_latest(self, last_sequence=0, timeout=1.0):
+        """
+        Get the newest captured frame
+        
+        Returns immediately when a frame newer than last_sequence is in the
+        slot, otherwise waits up to timeout for the next one.
+        
+        Args:
+            last_sequence (int): Sequence number of the last frame the caller processed
+            timeout (float): Maximum seconds to wait for a new frame
+            
+        Returns:
+            tuple: (sequence, timestamp, frame) - frame is None on timeout
+        """
+        with self.frame_condition:
+            if self.latest_sequence <= last_sequence:
+                self.frame_condition.wait(timeout)
+            
+            if self.latest_sequence <= last_sequence:
+                return last_sequence, self.latest_timestamp, None
+            
+            self.latest_consumed = True
+            return self.latest_sequence, self.latest_timestamp, self.latest_frame
+    
     def read_frame(self):
         """
         Read a frame from camera
         
+        Uses the latest-frame slot when the capture thread is running,
+        otherwise reads the device directly.
+        
+        Returns:
+            tuple: (success, frame)
+        """
+        if self.capturing:
+            sequence, _, frame = self.read_latest(self.last_read_sequence)
+            if frame is None:
+                return False, None
+            self.last_read_sequence = sequence
+            return True, frame
+        
+        return self._read_device()
+    
+    def _read_device(self):
+        """
+        Read a frame directly from the camera device
+        
         Returns:
             tuple: (success, frame)
         """
@@ -81,6 +192,18 @@ class CameraService:
         
         return success, frame
     
+    def get_capture_stats(self):
+        """Get capture thread counters"""
+        with self.frame_condition:
+            return {
+                'capturing': self.capturing,
+                'sequence': self.latest_sequence,
+                'frames_captured': self.frames_captured,
+                'frames_dropped': self.frames_dropped,
+                'read_failures': self.read_failures,
+                'frame_age': (time.time() - self.latest_timestamp) if self.latest_timestamp else None
+            }
+    
     def is_opened(self):
         """Check if camera is opened"""
         return self.camera is not None and self.camera.isOpened()
@@ -102,12 +225,19 @@ class CameraService:
         """
         Switch to a different camera index
         
+        The capture thread is stopped (and its in-flight read finished) before
+        the device is replaced, so it cannot reconnect the old camera
+        mid-switch; it is restarted afterwards.
+        
         Args:
             new_index (int): New camera index to switch to
             
         Returns:
             bool: True if successful, False otherwise
         """
+        was_capturing = self.capturing
+        self.stop_capture(timeout=None)
+        
         try:
             print(f"🔄 Switching from camera {self.camera_index} to camera {new_index}...")
             
@@ -128,9 +258,15 @@ class CameraService:
         except Exception as e:
             print(f"❌ Error switching camera: {e}")
             return False
+        
+        finally:
+            # Resume capture (the loop keeps retrying if the new device failed)
+            if was_capturing:
+                self.start_capture()
     
     def cleanup(self):
         """Release camera resources"""
+        self.stop_capture()
         if self.camera is not None:
             with self.camera_lock:
                 self.camera.release()
@@ -3,21 +3,78 @@ Database Service - SQLite Alert Storage
 Manages persistent storage of threat alerts
 """
 
+import queue
 import sqlite3
 import os
-from datetime import datetime
-from threading import Lock
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from threading import Lock, Thread
+
+
+class PendingAlert:
+    """Handle of an alert queued for write-behind insertion"""
+    
+    def __init__(self):
+        """Initialize handle (alert_id is set once the insert is committed)"""
+        self.alert_id = None
 
 
 class DatabaseService:
-    """Manages SQLite database for alert storage"""
+    """
+    Manages SQLite database for alert storage
+    
+    Connections are opened once and reused from a small pool, in WAL mode:
+    readers never wait for the writer, and writes are serialized by a lock
+    so they do not hit SQLITE_BUSY. Schema changes are applied by numbered
+    migrations tracked in PRAGMA user_version.
+    
+    queue_alert() / queue_update() never touch the database on the caller's
+    thread: a writer thread collects them and commits each batch in one
+    transaction, once batch_size writes are waiting or flush_interval
+    seconds after the first one.
+    """
+    
+    # Applied to every pooled connection
+    PRAGMAS = (
+        'PRAGMA synchronous = NORMAL',      # Safe with WAL, no fsync per commit
+        'PRAGMA cache_size = -16000',       # 16 MB page cache
+        'PRAGMA temp_store = MEMORY',
+        'PRAGMA busy_timeout = 5000'
+    )
+    
+    # Migration N upgrades the schema from user_version N-1 to N
+    MIGRATIONS = [
+        # 1: indexes for ordering and filtering alerts
+        [
+            'CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp)',
+            'CREATE INDEX IF NOT EXISTS idx_alerts_camera ON alerts (camera_id, timestamp)',
+            'CREATE INDEX IF NOT EXISTS idx_alerts_threat_type ON alerts (threat_type, timestamp)',
+            'CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts (severity, timestamp)'
+        ]
+    ]
+    
+    # Alert IDs bound per statement in bulk deletes
+    ID_BATCH_SIZE = 500
     
-    def __init__(self, db_path='database/alerts.db'):
+    # Columns queue_update() may change
+    UPDATABLE_COLUMNS = ('video_path', 'telegram_sent', 'status')
+    
+    # Attempts to commit a write-behind batch before it is dropped
+    MAX_WRITE_ATTEMPTS = 3
+    
+    # Queue marker that makes the writer commit at once
+    _FLUSH = object()
+    
+    def __init__(self, db_path='database/alerts.db', pool_size=4, batch_size=50, flush_interval=0.5):
         """
         Initialize database service
         
         Args:
             db_path (str): Path to SQLite database file
+            pool_size (int): Idle connections kept open for reuse
+            batch_size (int): Queued writes that trigger a commit
+            flush_interval (float): Max seconds a queued write waits for its batch
         """
         # Ensure database directory exists
         db_dir = os.path.dirname(db_path)
@@ -26,16 +83,61 @@ class DatabaseService:
         
         self.db_path = db_path
         self.lock = Lock()
+        self.pool = queue.LifoQueue(maxsize=pool_size)
         self.init_database()
+        
+        # Write-behind queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_queue = queue.Queue()
+        self.writer = Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+        
         print(f"✅ Database initialized: {db_path}")
     
+    def _connect(self):
+        """Open a tuned connection"""
+        # Pooled connections move between request threads
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def _connection(self, write=False):
+        """
+        Borrow a pooled connection
+        
+        Args:
+            write (bool): Run as one write transaction (committed on success,
+                          rolled back on error)
+        """
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        
+        try:
+            if write:
+                with self.lock, conn:
+                    yield conn
+            else:
+                yield conn
+        finally:
+            try:
+                self.pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+    
     def init_database(self):
-        """Create alerts table if it doesn't exist"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+        """Create alerts table if it doesn't exist and apply pending migrations"""
+        with self._connection() as conn:
+            # WAL is persistent: stored in the database file once set
+            conn.execute('PRAGMA journal_mode = WAL')
+        
+        with self._connection(write=True) as conn:
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS alerts (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -48,10 +150,27 @@ class DatabaseService:
                 )
             ''')
             
-            conn.commit()
-            conn.close()
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, statements in enumerate(self.MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                # PRAGMA does not accept parameters; number is an int from enumerate()
+                conn.execute(f'PRAGMA user_version = {number}')
+                print(f"🔧 Database migrated to schema version {number}")
+    
+    def close(self):
+        """Write every queued alert, then close the pooled connections"""
+        if self.writer.is_alive():
+            self.write_queue.put(None)
+            self.writer.join()
+        
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                break
     
-    def add_alert(self, threat_type, camera_id=0, video_path=None, telegram_sent=False):
+    def add_alert(self, threat_type, camera_id=0, video_path=None, telegram_sent=False, severity='High'):
         """
         Add new alert to database
         
@@ -60,28 +179,163 @@ class DatabaseService:
             camera_id (int): Camera that detected the threat
             video_path (str): Path to forensic video
             telegram_sent (bool): Whether Telegram alert was sent
+            severity (str): Severity of the matched threat rule
             
         Returns:
             int: ID of inserted alert
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Determine severity
-            severity = self._get_severity(threat_type)
-            
-            cursor.execute('''
+        with self._connection(write=True) as conn:
+            cursor = conn.execute('''
                 INSERT INTO alerts (threat_type, camera_id, severity, video_path, telegram_sent)
                 VALUES (?, ?, ?, ?, ?)
             ''', (threat_type, camera_id, severity, video_path, telegram_sent))
-            
             alert_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+        
+        print(f"💾 Alert saved to database: ID={alert_id}, Type={threat_type}")
+        return alert_id
+    
+    def queue_alert(self, threat_type, camera_id=0, video_path=None, telegram_sent=False,
+                    severity='High', status='Recorded'):
+        """
+        Queue a new alert for the writer thread (returns immediately)
+        
+        Args:
+            threat_type (str): Type of threat detected
+            camera_id (int): Camera that detected the threat
+            video_path (str): Path to forensic video
+            telegram_sent (bool): Whether Telegram alert was sent
+            severity (str): Severity of the matched threat rule
+            status (str): Alert status, e.g. 'Recording' until the video is ready
             
-            print(f"💾 Alert saved to database: ID={alert_id}, Type={threat_type}")
-            return alert_id
+        Returns:
+            PendingAlert: Handle for queue_update(); alert_id is set once written
+        """
+        alert = PendingAlert()
+        # Same format as CURRENT_TIMESTAMP, taken now rather than at commit time
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.write_queue.put(('insert', alert, (timestamp, threat_type, camera_id, severity,
+                                                 video_path, telegram_sent, status)))
+        return alert
+    
+    def queue_update(self, alert, **fields):
+        """
+        Queue changes to an alert (returns immediately)
+        
+        Args:
+            alert (PendingAlert or int): Handle from queue_alert() or an alert ID
+            **fields: New values for video_path, telegram_sent and/or status
+        """
+        unknown = set(fields) - set(self.UPDATABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot update alert columns: {sorted(unknown)}")
+        
+        self.write_queue.put(('update', alert, fields))
+    
+    def flush(self):
+        """Block until every write queued so far is committed"""
+        self.write_queue.put(self._FLUSH)
+        self.write_queue.join()
+    
+    def _write_loop(self):
+        """Writer thread: commit queued writes in batches"""
+        batch = []
+        deadline = None
+        running = True
+        
+        while running:
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            try:
+                item = self.write_queue.get(timeout=timeout)
+            except queue.Empty:
+                item = self._FLUSH
+            else:
+                # Items count as done once their batch is handled
+                batch.append(item)
+            
+            if item is None:
+                running = False
+            elif item is not self._FLUSH:
+                if deadline is None:
+                    deadline = time.time() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            
+            ops = [op for op in batch if op is not None and op is not self._FLUSH]
+            try:
+                self._write_batch(ops)
+            except Exception as e:
+                # Keep the writer alive: flush() and close() wait on it
+                print(f"❌ Alert writer error, dropped {len(ops)} queued writes: {e}")
+            finally:
+                for _ in batch:
+                    self.write_queue.task_done()
+            batch = []
+            deadline = None
+    
+    def _write_batch(self, ops):
+        """
+        Apply queued writes in one transaction
+        
+        A locked/busy database is retried. If the batch still fails, its ops
+        are written one per transaction so a single bad op is logged and
+        dropped without losing the rest.
+        """
+        if not ops:
+            return
+        
+        for attempt in range(1, self.MAX_WRITE_ATTEMPTS + 1):
+            try:
+                inserted = self._apply_ops(ops)
+                if inserted:
+                    print(f"💾 Alerts saved to database: {inserted} new, {len(ops) - inserted} updates")
+                return
+            except sqlite3.OperationalError as e:
+                print(f"❌ Error writing alerts (attempt {attempt}/{self.MAX_WRITE_ATTEMPTS}): {e}")
+                time.sleep(self.flush_interval)
+            except Exception as e:
+                print(f"❌ Error writing alerts: {e}")
+                break
+        
+        for op in ops:
+            try:
+                self._apply_ops([op])
+            except Exception as e:
+                print(f"❌ Dropped queued alert write {op[0]} {op[2]}: {e}")
+    
+    def _apply_ops(self, ops):
+        """
+        Apply writes in one transaction
+        
+        Returns:
+            int: Number of alerts inserted
+        """
+        try:
+            with self._connection(write=True) as conn:
+                inserted = 0
+                for kind, alert, values in ops:
+                    if kind == 'insert':
+                        cursor = conn.execute('''
+                            INSERT INTO alerts (timestamp, threat_type, camera_id, severity,
+                                                video_path, telegram_sent, status)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ''', values)
+                        alert.alert_id = cursor.lastrowid
+                        inserted += 1
+                    else:
+                        alert_id = alert.alert_id if isinstance(alert, PendingAlert) else alert
+                        if alert_id is None:
+                            print("⚠️ Alert update dropped: alert was never written")
+                            continue
+                        assignments = ', '.join(f'{column} = ?' for column in values)
+                        conn.execute(f'UPDATE alerts SET {assignments} WHERE id = ?',
+                                     (*values.values(), alert_id))
+            return inserted
+        except Exception:
+            # Rolled back: IDs from this attempt are not valid
+            for kind, alert, values in ops:
+                if kind == 'insert':
+                    alert.alert_id = None
+            raise
     
     def get_all_alerts(self, limit=None, offset=0):
         """
@@ -94,109 +348,245 @@ class DatabaseService:
         Returns:
             list: List of alert dictionaries
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
-            cursor = conn.cursor()
+        query = 'SELECT * FROM alerts ORDER BY timestamp DESC, id DESC'
+        params = ()
+        if limit:
+            query += ' LIMIT ? OFFSET ?'
+            params = (limit, offset)
+        
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    def query_alerts(self, limit=50, before_id=None, after_ts=None, camera_id=None,
+                     threat_type=None, severity=None, until_ts=None):
+        """
+        Get one page of alerts, newest first
+        
+        Keyset pagination: pass the last ID of a page as before_id to get
+        the next one. Every filter combination is served by an index
+        ordered on timestamp, so a page costs the same however many
+        alerts are stored.
+        
+        Args:
+            limit (int): Page size
+            before_id (int): Only alerts older than this alert (page cursor)
+            after_ts (str): Only alerts after this timestamp ('YYYY-MM-DD HH:MM:SS', UTC)
+            camera_id (int): Only alerts from this camera
+            threat_type (str): Only alerts of this threat type
+            severity (str): Only alerts of this severity
+            until_ts (str): Only alerts up to this timestamp
             
-            query = 'SELECT * FROM alerts ORDER BY timestamp DESC'
-            if limit:
-                query += f' LIMIT {limit} OFFSET {offset}'
+        Returns:
+            list: List of alert dictionaries
             
-            cursor.execute(query)
-            rows = cursor.fetchall()
+        Raises:
+            ValueError: If a timestamp bound is malformed
+        """
+        after_ts = self._parse_timestamp(after_ts, 'after_ts')
+        until_ts = self._parse_timestamp(until_ts, 'until_ts')
+        conditions, params = self._filter_conditions(after_ts, until_ts, camera_id, threat_type, severity)
+        
+        with self._connection() as conn:
+            if before_id is not None:
+                cursor_row = conn.execute('SELECT timestamp FROM alerts WHERE id = ?', (before_id,)).fetchone()
+                if cursor_row is not None:
+                    # Row-value comparison matches the (timestamp, id) sort order
+                    conditions.append('(timestamp, id) < (?, ?)')
+                    params.extend((cursor_row['timestamp'], before_id))
+                else:
+                    # Cursor alert was deleted: IDs grow with insertion time
+                    conditions.append('id < ?')
+                    params.append(before_id)
             
-            alerts = [dict(row) for row in rows]
-            conn.close()
+            query = 'SELECT * FROM alerts'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            query += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+            params.append(limit)
             
-            return alerts
+            rows = conn.execute(query, params).fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    @staticmethod
+    def _filter_conditions(after_ts=None, until_ts=None, camera_id=None, threat_type=None, severity=None):
+        """Build WHERE conditions and parameters for alert filters"""
+        conditions = []
+        params = []
+        
+        for column, value in (('camera_id', camera_id), ('threat_type', threat_type),
+                              ('severity', severity)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        
+        if after_ts is not None:
+            conditions.append('timestamp > ?')
+            params.append(after_ts)
+        if until_ts is not None:
+            conditions.append('timestamp <= ?')
+            params.append(until_ts)
+        
+        return conditions, params
+    
+    @staticmethod
+    def _parse_timestamp(value, name):
+        """
+        Check a timestamp bound ('YYYY-MM-DD HH:MM:SS', as stored)
+        
+        Raises:
+            ValueError: If the value is not in the stored format
+        """
+        if value is None:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be 'YYYY-MM-DD HH:MM:SS'")
+    
+    def get_alert(self, alert_id):
+        """
+        Get one alert by ID
+        
+        Args:
+            alert_id (int): Alert ID
+            
+        Returns:
+            dict: Alert, or None if it does not exist
+        """
+        with self._connection() as conn:
+            row = conn.execute('SELECT * FROM alerts WHERE id = ?', (alert_id,)).fetchone()
+        
+        return dict(row) if row is not None else None
     
     def get_recent_alerts(self, limit=5):
         """Get most recent alerts"""
-        return self.get_all_alerts(limit=limit)
+        return self.query_alerts(limit=limit)
     
-    def get_alerts_count(self):
+    def get_alerts_count(self, after_ts=None, until_ts=None, camera_id=None, threat_type=None,
+                         severity=None):
         """
-        Get total number of alerts
+        Get total number of alerts (optionally only those matching filters)
+        
+        Args:
+            after_ts (str): Only alerts after this timestamp ('YYYY-MM-DD HH:MM:SS', UTC)
+            until_ts (str): Only alerts up to this timestamp
+            camera_id (int): Only alerts from this camera
+            threat_type (str): Only alerts of this threat type
+            severity (str): Only alerts of this severity
         
         Returns:
             dict: Total and unread counts
-        """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
             
-            cursor.execute('SELECT COUNT(*) FROM alerts')
-            total = cursor.fetchone()[0]
-            
-            # For now, unread is 0 (can implement read status later)
-            conn.close()
-            
-            return {'total': total, 'unread': 0}
+        Raises:
+            ValueError: If a timestamp bound is malformed
+        """
+        after_ts = self._parse_timestamp(after_ts, 'after_ts')
+        until_ts = self._parse_timestamp(until_ts, 'until_ts')
+        conditions, params = self._filter_conditions(after_ts, until_ts, camera_id, threat_type, severity)
+        query = 'SELECT COUNT(*) FROM alerts'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        with self._connection() as conn:
+            total = conn.execute(query, params).fetchone()[0]
+        
+        # For now, unread is 0 (can implement read status later)
+        return {'total': total, 'unread': 0}
     
     def delete_alert(self, alert_id):
         """Delete alert by ID"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
-            conn.commit()
-            conn.close()
+        with self._connection(write=True) as conn:
+            conn.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
+        
+        print(f"🗑️ Alert deleted: ID={alert_id}")
+    
+    def delete_alerts(self, alert_ids=None, after_ts=None, until_ts=None):
+        """
+        Delete many alerts in one transaction
+        
+        Alerts are selected by ID list, time range or both (combined with AND).
+        
+        Args:
+            alert_ids (list): Alert IDs to delete
+            after_ts (str): Delete alerts after this timestamp ('YYYY-MM-DD HH:MM:SS', UTC)
+            until_ts (str): Delete alerts up to this timestamp
             
-            print(f"🗑️ Alert deleted: ID={alert_id}")
+        Returns:
+            tuple: (deleted_count: int, video_paths: list) - videos of the deleted alerts
+        """
+        if alert_ids is None and after_ts is None and until_ts is None:
+            raise ValueError("No alerts selected: pass alert IDs or a time range")
+        
+        # Timestamps are compared as text: a wrongly formatted bound would match everything
+        after_ts = self._parse_timestamp(after_ts, 'after_ts')
+        until_ts = self._parse_timestamp(until_ts, 'until_ts')
+        
+        conditions, params = self._filter_conditions(after_ts, until_ts)
+        
+        if alert_ids is None:
+            batches = [(conditions, params)]
+        else:
+            # Stay below SQLite's bound-parameter limit
+            alert_ids = list(alert_ids)
+            batches = []
+            for start in range(0, len(alert_ids), self.ID_BATCH_SIZE):
+                chunk = alert_ids[start:start + self.ID_BATCH_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                batches.append((conditions + [f'id IN ({placeholders})'], params + chunk))
+        
+        deleted = 0
+        video_paths = []
+        with self._connection(write=True) as conn:
+            for batch_conditions, batch_params in batches:
+                where = ' WHERE ' + ' AND '.join(batch_conditions)
+                rows = conn.execute(
+                    'SELECT video_path FROM alerts' + where + ' AND video_path IS NOT NULL', batch_params
+                ).fetchall()
+                video_paths.extend(row[0] for row in rows)
+                deleted += conn.execute('DELETE FROM alerts' + where, batch_params).rowcount
+        
+        print(f"🗑️ Alerts deleted: {deleted}")
+        return deleted, video_paths
     
     def clear_all_alerts(self):
-        """Delete all alerts"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM alerts')
-            conn.commit()
-            conn.close()
-            
-            print("🗑️ All alerts cleared")
-    
-    def _get_severity(self, threat_type):
-        """Determine severity level from threat type"""
-        severity_map = {
-            "Balaclava Detected": "Critical",
-            "Person + Weapon": "Critical",
-            "Person + Knife": "High",
-            "Phone Detected": "Medium"
-        }
-        return severity_map.get(threat_type, "High")
+        """
+        Delete all alerts
+        
+        Returns:
+            tuple: (deleted_count: int, video_paths: list) - videos of the deleted alerts
+        """
+        with self._connection(write=True) as conn:
+            rows = conn.execute('SELECT video_path FROM alerts WHERE video_path IS NOT NULL').fetchall()
+            deleted = conn.execute('DELETE FROM alerts').rowcount
+        
+        print("🗑️ All alerts cleared")
+        return deleted, [row[0] for row in rows]
     
     def get_stats(self):
         """Get database statistics"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
+        with self._connection() as conn:
             # Total alerts
-            cursor.execute('SELECT COUNT(*) FROM alerts')
-            total = cursor.fetchone()[0]
+            total = conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
             
-            # Alerts today
-            cursor.execute('''
+            # Alerts today (range on the raw column so the timestamp index is used)
+            today = conn.execute('''
                 SELECT COUNT(*) FROM alerts 
-                WHERE DATE(timestamp) = DATE('now')
-            ''')
-            today = cursor.fetchone()[0]
+                WHERE timestamp >= DATE('now')
+            ''').fetchone()[0]
             
             # Alerts by severity
-            cursor.execute('''
+            rows = conn.execute('''
                 SELECT severity, COUNT(*) as count 
                 FROM alerts 
                 GROUP BY severity
-            ''')
-            by_severity = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            conn.close()
-            
-            return {
-                'total': total,
-                'today': today,
-                'by_severity': by_severity
-            }
+            ''').fetchall()
+            by_severity = {row[0]: row[1] for row in rows}
+        
+        return {
+            'total': total,
+            'today': today,
+            'by_severity': by_severity
+        }
@@ -0,0 +1,157 @@
+"""
+Detections - Compact Per-Frame Detection Results
+Holds YOLO boxes as contiguous NumPy arrays instead of per-box objects
+"""
+
+import numpy as np
+
+
+def _to_numpy(tensor):
+    """Convert a torch tensor (or array-like) to a NumPy array"""
+    if hasattr(tensor, 'cpu'):
+        tensor = tensor.cpu()
+    if hasattr(tensor, 'numpy'):
+        return tensor.numpy()
+    return np.asarray(tensor)
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise IoU between two sets of xyxy boxes
+
+    Returns:
+        numpy array: (len(boxes_a), len(boxes_b)) IoU values
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0)
+
+
+class Detections:
+    """
+    Detections for one frame
+
+    Attributes:
+        xyxy: (N, 4) float32 box corners
+        confidence: (N,) float32 scores
+        class_id: (N,) int32 class IDs
+        class_names (dict): Class ID → display name
+        track_id: (N,) int32 tracker IDs, or None if untracked
+    """
+
+    def __init__(self, xyxy, confidence, class_id, class_names, track_id=None):
+        """
+        Initialize detections
+
+        Args:
+            xyxy: (N, 4) box corners
+            confidence: (N,) scores
+            class_id: (N,) class IDs
+            class_names (dict): Class ID → display name
+            track_id: (N,) tracker IDs (optional)
+        """
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.confidence = np.asarray(confidence, dtype=np.float32).reshape(-1)
+        self.class_id = np.asarray(class_id, dtype=np.int32).reshape(-1)
+        self.class_names = class_names
+        self.track_id = None if track_id is None else np.asarray(track_id, dtype=np.int32).reshape(-1)
+
+    @classmethod
+    def empty(cls, class_names):
+        """Create an empty detection set"""
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), class_names)
+
+    @classmethod
+    def from_results(cls, results, class_names):
+        """
+        Extract all boxes from YOLO results in one transfer per result
+
+        Args:
+            results: YOLO Results list
+            class_names (dict): Class ID → display name
+
+        Returns:
+            Detections: Boxes from every result, concatenated
+        """
+        # boxes.data rows are [x1, y1, x2, y2, conf, cls]
+        arrays = [_to_numpy(result.boxes.data) for result in results if len(result.boxes)]
+
+        if not arrays:
+            return cls.empty(class_names)
+
+        return cls.from_array(arrays[0] if len(arrays) == 1 else np.concatenate(arrays), class_names)
+
+    @classmethod
+    def from_array(cls, data, class_names):
+        """
+        Build detections from an (N, 6) array of [x1, y1, x2, y2, conf, cls] rows
+
+        Args:
+            data: (N, 6) array
+            class_names (dict): Class ID → display name
+
+        Returns:
+            Detections: Detections for the rows
+        """
+        data = np.asarray(data).reshape(-1, 6)
+        return cls(data[:, :4], data[:, 4], data[:, 5], class_names)
+
+    def __len__(self):
+        return len(self.class_id)
+
+    def __iter__(self):
+        """Iterate as detection dictionaries (legacy format)"""
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        """Select detections by index, slice or boolean mask"""
+        if isinstance(index, (int, np.integer)):
+            return self.to_list()[index]
+        track_id = None if self.track_id is None else self.track_id[index]
+        return Detections(self.xyxy[index], self.confidence[index], self.class_id[index],
+                          self.class_names, track_id)
+
+    def to_list(self):
+        """
+        Convert to a list of detection dictionaries
+
+        Returns:
+            list: [{'class': str, 'confidence': float, 'class_id': int, 'box': list}]
+                  (plus 'track_id' when tracked)
+        """
+        items = [
+            {
+                'class': self.class_names.get(int(cls_id), f"Class {cls_id}"),
+                'confidence': float(conf),
+                'class_id': int(cls_id),
+                'box': box.tolist()
+            }
+            for box, conf, cls_id in zip(self.xyxy, self.confidence, self.class_id)
+        ]
+
+        if self.track_id is not None:
+            for item, track_id in zip(items, self.track_id.tolist()):
+                item['track_id'] = track_id
+
+        return items
+
+    def class_set(self):
+        """Get the set of class names present in this frame"""
+        return {self.class_names.get(int(cls_id), f"Class {cls_id}") for cls_id in np.unique(self.class_id)}
+
+    def count_by_class(self):
+        """
+        Count detections per class name
+
+        Returns:
+            dict: {class_name: count}
+        """
+        ids, counts = np.unique(self.class_id, return_counts=True)
+        return {self.class_names.get(int(cls_id), f"Class {cls_id}"): int(count)
+                for cls_id, count in zip(ids, counts)}
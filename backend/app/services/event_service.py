@@ -0,0 +1,157 @@
+"""
+Event Service - Push Channel for Logs and Threat State
+Sequenced, bounded event history that browsers follow over Server-Sent Events
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+
+class Event:
+    """A single pushed event"""
+
+    def __init__(self, sequence, event_type, data):
+        """
+        Initialize event
+
+        Args:
+            sequence (int): Monotonic event ID
+            event_type (str): 'log' or 'threat'
+            data (dict): JSON-serialisable payload
+        """
+        self.sequence = sequence
+        self.event_type = event_type
+        self.data = data
+        self.timestamp = time.time()
+
+    def to_sse(self):
+        """Format as a Server-Sent Events message"""
+        return f"id: {self.sequence}\nevent: {self.event_type}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class EventStream:
+    """
+    Bounded history of sequenced events
+
+    Every event gets the next sequence number. Clients remember the last
+    sequence they saw and ask for everything after it, so a reconnecting
+    browser (EventSource sends Last-Event-ID) receives exactly what it
+    missed - or a reset if it fell out of the history window.
+    """
+
+    def __init__(self, max_events=500):
+        """
+        Initialize event stream
+
+        Args:
+            max_events (int): Events kept for replay
+        """
+        self.events = deque(maxlen=max_events)
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.listeners = []
+
+    def publish(self, event_type, data):
+        """
+        Append an event and wake every waiting client
+
+        Args:
+            event_type (str): Event name
+            data (dict): Payload
+
+        Returns:
+            int: Sequence number of the event
+        """
+        with self.condition:
+            self.sequence += 1
+            sequence = self.sequence
+            self.events.append(Event(sequence, event_type, data))
+            self.condition.notify_all()
+            listeners = list(self.listeners)
+
+        for listener in listeners:
+            listener(sequence)
+
+        return sequence
+
+    def add_listener(self, callback):
+        """Register a callback(sequence) run after each publish (for async servers)"""
+        with self.condition:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregister a publish callback"""
+        with self.condition:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+
+    def events_since(self, since):
+        """
+        Get events newer than a sequence number
+
+        Args:
+            since (int): Last sequence the client has seen
+
+        Returns:
+            tuple: (events: list, complete: bool) - complete is False if events
+                   after `since` were already dropped from the history
+        """
+        with self.condition:
+            return self._events_since(since)
+
+    def _events_since(self, since):
+        """events_since() without locking"""
+        if since > self.sequence:
+            # Client saw a previous server run: everything here is new to it
+            return list(self.events), False
+        if since == self.sequence:
+            return [], True
+
+        oldest = self.events[0].sequence if self.events else self.sequence + 1
+        complete = since >= oldest - 1
+        return [event for event in self.events if event.sequence > since], complete
+
+    def wait_for_events(self, since, timeout=15.0):
+        """
+        Block until events newer than `since` exist
+
+        Args:
+            since (int): Last sequence the client has seen
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            tuple: (events: list, complete: bool), empty on timeout
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > since, timeout)
+            return self._events_since(since)
+
+    def resume(self, since, threat_status):
+        """
+        First SSE messages for a (re)connecting client
+
+        Missed log events are replayed. Threat state is sent as a snapshot
+        instead of replaying old threat events, so a reconnect does not
+        re-trigger alarms that are already over.
+
+        Args:
+            since (int): Last sequence the client has seen (0 for a new client)
+            threat_status (dict): Current threat status
+
+        Returns:
+            tuple: (sse_text: str, last_sequence: int)
+        """
+        with self.condition:
+            events, complete = self._events_since(since)
+            last_sequence = self.sequence
+
+        text = "retry: 2000\n\n"
+        if not complete:
+            # Replay has a gap: the client should drop what it shows
+            text += "event: reset\ndata: {}\n\n"
+        # Snapshot has no ID so it does not move the client's resume point
+        text += f"event: threat\ndata: {json.dumps(threat_status)}\n\n"
+        text += "".join(event.to_sse() for event in events if event.event_type != 'threat')
+        return text, last_sequence
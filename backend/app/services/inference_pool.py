@@ -0,0 +1,398 @@
+"""
+Inference Pool - Multi-Process YOLO Workers
+Runs inference in worker processes, passing frames through shared memory
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+from app.services.detections import Detections
+
+
+def _worker_main(worker_id, model_settings, inference_size, conf_threshold, shm_name, slot_size,
+                 conn, torch_threads):
+    """
+    Worker process: load the model, then run inference on frames in shared memory
+
+    Tasks arrive on conn as (request_id, slot, shape) tuples; results go back
+    on it as (request_id, worker_id, slot, data, error) with data an (N, 6)
+    float32 array of [x1, y1, x2, y2, conf, cls] rows.
+    """
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from app.services.yolo_service import YOLOService
+
+    yolo_service = YOLOService(**model_settings)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    conn.send(('ready', worker_id, None, None, None))
+
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+
+            request_id, slot, shape = task
+            try:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_size)
+                results = yolo_service.run_inference(
+                    frame, inference_size=inference_size, conf_threshold=conf_threshold
+                )
+                detections = yolo_service.get_detections(results)
+                data = np.column_stack([detections.xyxy, detections.confidence, detections.class_id])
+                conn.send((request_id, worker_id, slot, data.astype(np.float32), None))
+            except Exception as e:
+                conn.send((request_id, worker_id, slot, None, str(e)))
+            finally:
+                # Drop the view so the shared block can be closed on exit
+                frame = None
+    finally:
+        shm.close()
+
+
+class PoolRequest:
+    """A frame waiting for a worker"""
+
+    def __init__(self):
+        """Initialize request"""
+        self.done = threading.Event()
+        self.detections = None
+        self.error = None
+
+
+class InferencePool:
+    """
+    Pool of inference worker processes
+
+    Each worker loads its own copy of the model (same runtime as the given
+    YOLOService), so inference runs outside this process's GIL and scales
+    across cores. Frames are copied into fixed-size slots of one shared
+    memory block and only the slot index is queued; results come back as
+    compact NumPy arrays. Drop-in for BatchInferenceService: pipelines
+    call run_inference() and get Detections back.
+    
+    Each worker talks to this process over its own pipe (no lock is shared
+    between processes, so a killed worker cannot leave one held) and frames
+    go to the worker with the fewest in flight. When a worker's pipe
+    closes, the result listener fails that worker's requests, frees their
+    slots and restarts it on a new pipe. A request that times out is
+    abandoned but keeps its slot (the worker may still be reading it) until
+    the late result arrives, which is then discarded, or the worker is
+    restarted.
+    """
+
+    def __init__(self, yolo_service, workers=4, slot_count=None, frame_shape=(480, 640, 3),
+                 inference_size=None, conf_threshold=0.15, torch_threads=None, request_timeout=30):
+        """
+        Initialize inference pool
+
+        Args:
+            yolo_service: YOLO service of this process (model settings, class names,
+                          in-process fallback)
+            workers (int): Number of worker processes
+            slot_count (int): Shared frame slots (default: two per worker, at least
+                              one per camera pipeline)
+            frame_shape (tuple): Largest frame shape (height, width, channels)
+            inference_size (int): Size for inference (default: the YOLO service's)
+            conf_threshold (float): Confidence threshold
+            torch_threads (int): Torch threads per worker (default: cores / workers)
+            request_timeout (float): Seconds to wait for a worker result
+        """
+        self.yolo_service = yolo_service
+        self.workers = max(1, workers)
+        self.slot_count = slot_count or self.workers * 2
+        self.slot_size = int(np.prod(frame_shape))
+        self.inference_size = inference_size or yolo_service.inference_size
+        self.conf_threshold = conf_threshold
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.request_timeout = request_timeout
+
+        # Workers load the runtime this process ended up with (export already cached/validated)
+        self.model_settings = {
+            'model_path': yolo_service.model_path,
+            'backend': yolo_service.backend,
+            'int8': yolo_service.exporter.int8,
+            'inference_size': yolo_service.exporter.inference_size
+        }
+
+        self.shm = None
+        self.frames = []
+        self.processes = []
+        self.connections = []
+        self.send_locks = []
+        self.worker_ready = []
+        self.free_slots = queue.Queue()
+        self.requests = {}
+        self.in_flight = {}
+        self.worker_load = []
+        self.requests_lock = threading.Lock()
+        self.next_request_id = 0
+        self.listener = None
+        self.running = False
+
+        # Statistics
+        self.workers_restarted = 0
+        self.requests_timed_out = 0
+        self.frames_run = 0
+        self.fallback_frames = 0
+        self.total_latency = 0.0
+
+    def set_expected_sources(self, count):
+        """
+        Set how many pipelines submit frames
+        
+        Each pipeline has at most one frame in flight, so one slot per
+        pipeline means no pipeline waits for a free slot. Call before start().
+        """
+        if not self.running:
+            self.slot_count = max(self.slot_count, count)
+
+    def start(self):
+        """Create the shared frame slots and start the worker processes"""
+        if self.running:
+            return
+
+        context = mp.get_context('spawn')
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_size * self.slot_count)
+        self.frames = [
+            np.ndarray((self.slot_size,), dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_size)
+            for slot in range(self.slot_count)
+        ]
+        for slot in range(self.slot_count):
+            self.free_slots.put(slot)
+
+        self.context = context
+        self.worker_load = [0] * self.workers
+        self.worker_ready = [False] * self.workers
+        self.send_locks = [threading.Lock() for _ in range(self.workers)]
+        self.processes = [None] * self.workers
+        self.connections = [None] * self.workers
+        self.running = True
+
+        for worker_id in range(self.workers):
+            self._spawn_worker(worker_id)
+
+        self.listener = threading.Thread(target=self._collect_results, daemon=True)
+        self.listener.start()
+        print(f"✅ Inference pool started ({self.workers} workers, {self.slot_count} frame slots, "
+              f"{self.torch_threads} torch threads each)")
+
+    def _spawn_worker(self, worker_id):
+        """Start one worker process on a new pipe"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker_id, self.model_settings, self.inference_size, self.conf_threshold,
+                  self.shm.name, self.slot_size, child_conn, self.torch_threads),
+            daemon=True
+        )
+        process.start()
+        # Only the worker holds its end now, so its exit closes the pipe
+        child_conn.close()
+
+        with self.send_locks[worker_id]:
+            self.processes[worker_id] = process
+            self.connections[worker_id] = parent_conn
+
+    def _restart_worker(self, worker_id):
+        """Fail the requests of an exited worker and restart it (listener thread)"""
+        process = self.processes[worker_id]
+        process.join(1.0)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+        print(f"⚠️ Inference worker {worker_id} died (exit code {process.exitcode}), restarting")
+        self.worker_ready[worker_id] = False
+        self.workers_restarted += 1
+        self.connections[worker_id].close()
+
+        with self.requests_lock:
+            lost = [request_id for request_id, (owner, _) in self.in_flight.items() if owner == worker_id]
+        for request_id in lost:
+            request = self._finish(request_id)
+            if request is not None:
+                request.error = RuntimeError(f"Inference worker {worker_id} died")
+                request.done.set()
+
+        self._spawn_worker(worker_id)
+
+    def _finish(self, request_id):
+        """
+        Release a request's slot and worker
+        
+        Returns:
+            PoolRequest: The waiting request, or None if it timed out or already finished
+        """
+        with self.requests_lock:
+            request = self.requests.pop(request_id, None)
+            entry = self.in_flight.pop(request_id, None)
+            if entry is not None:
+                self.worker_load[entry[0]] -= 1
+        if entry is not None:
+            self.free_slots.put(entry[1])
+        return request
+
+    def stop(self, timeout=5.0):
+        """Stop the workers, fail pending requests and release shared memory"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self.listener is not None:
+            self.listener.join(timeout)
+            self.listener = None
+
+        for worker_id, conn in enumerate(self.connections):
+            try:
+                with self.send_locks[worker_id]:
+                    conn.send(None)
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for conn in self.connections:
+            conn.close()
+        self.processes = []
+        self.connections = []
+
+        with self.requests_lock:
+            pending, self.requests = self.requests, {}
+            self.in_flight = {}
+        for request in pending.values():
+            request.error = RuntimeError("Inference pool stopped")
+            request.done.set()
+
+        self.frames = []
+        self.free_slots = queue.Queue()
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def run_inference(self, frame):
+        """
+        Run inference on a frame in a worker process
+
+        Args:
+            frame: Input image frame (numpy array, uint8)
+
+        Returns:
+            Detections: Detections for this frame
+        """
+        if not self.running or frame.nbytes > self.slot_size:
+            # Not started, or frame larger than a slot: run in this process
+            self.fallback_frames += 1
+            results = self.yolo_service.run_inference(
+                frame, inference_size=self.inference_size, conf_threshold=self.conf_threshold
+            )
+            return self.yolo_service.get_detections(results)
+
+        start = time.time()
+        try:
+            slot = self.free_slots.get(timeout=self.request_timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No free inference slot after {self.request_timeout}s")
+        self.frames[slot][:frame.nbytes] = frame.reshape(-1)
+
+        request = PoolRequest()
+        with self.requests_lock:
+            request_id = self.next_request_id
+            self.next_request_id += 1
+            worker_id = min(range(self.workers), key=self.worker_load.__getitem__)
+            self.worker_load[worker_id] += 1
+            self.requests[request_id] = request
+            self.in_flight[request_id] = (worker_id, slot)
+
+        try:
+            with self.send_locks[worker_id]:
+                self.connections[worker_id].send((request_id, slot, frame.shape))
+        except OSError:
+            # Worker died and its pipe is being replaced
+            self._finish(request_id)
+            raise RuntimeError(f"Inference worker {worker_id} unavailable")
+
+        if not request.done.wait(self.request_timeout):
+            # Abandon the request; its slot stays reserved until the worker answers
+            with self.requests_lock:
+                abandoned = self.requests.pop(request_id, None) is not None
+            if abandoned:
+                self.requests_timed_out += 1
+                raise RuntimeError(f"Inference pool timed out after {self.request_timeout}s")
+            # Result arrived while the wait timed out: the listener is completing it
+            request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+
+        self.total_latency += time.time() - start
+        return request.detections
+
+    def _collect_results(self):
+        """Listener thread: hand worker results back to waiting requests"""
+        while self.running:
+            for conn in connection.wait(list(self.connections), timeout=0.5):
+                worker_id = self.connections.index(conn)
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    # Pipe closed: the worker exited
+                    if self.running:
+                        self._restart_worker(worker_id)
+                    continue
+                self._handle_result(message)
+
+    def _handle_result(self, message):
+        """Complete the request a worker result belongs to (listener thread)"""
+        request_id, worker_id, slot, data, error = message
+        if request_id == 'ready':
+            self.worker_ready[worker_id] = True
+            return
+
+        with self.requests_lock:
+            current = self.in_flight.get(request_id) == (worker_id, slot)
+        if not current:
+            # Stale result (its worker was already written off)
+            return
+
+        request = self._finish(request_id)
+        if request is None:
+            # Request timed out: the slot is free again, the result is dropped
+            return
+
+        if error is not None:
+            request.error = RuntimeError(f"Inference worker {worker_id}: {error}")
+        else:
+            request.detections = Detections.from_array(data, self.yolo_service.class_names)
+            self.frames_run += 1
+        request.done.set()
+
+    def get_status(self):
+        """Get pool statistics"""
+        return {
+            'running': self.running,
+            'workers': self.workers,
+            'workers_ready': sum(self.worker_ready),
+            'workers_alive': sum(process.is_alive() for process in self.processes),
+            'workers_restarted': self.workers_restarted,
+            'slots': self.slot_count,
+            'free_slots': self.free_slots.qsize(),
+            'frames_run': self.frames_run,
+            'fallback_frames': self.fallback_frames,
+            'requests_timed_out': self.requests_timed_out,
+            'avg_latency_ms': round(self.total_latency / self.frames_run * 1000, 1) if self.frames_run else 0
+        }
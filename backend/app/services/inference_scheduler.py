@@ -0,0 +1,105 @@
+"""
+Inference Scheduler - Adaptive Detection Rate
+Decides which displayed frames are sent to the model
+"""
+
+import threading
+import time
+
+
+class InferenceScheduler:
+    """
+    Decouples detection rate from display rate
+
+    Either detects every Nth displayed frame, or runs at a target detection
+    rate that switches between an active rate (someone in view) and an idle
+    rate (empty scene). Activity is held for a few seconds after the last
+    sighting so detection doesn't slow down between two frames of a person.
+    """
+
+    def __init__(self, active_fps=8, idle_fps=2, every_n_frames=None, active_hold_seconds=5):
+        """
+        Initialize scheduler
+
+        Args:
+            active_fps (float): Detection rate while the scene is active
+            idle_fps (float): Detection rate while the scene is empty
+            every_n_frames (int): If set, detect every Nth frame instead
+            active_hold_seconds (float): Stay active this long after last activity
+        """
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.every_n_frames = every_n_frames
+        self.active_hold_seconds = active_hold_seconds
+
+        self.lock = threading.Lock()
+        self.active_until = 0
+        self.last_inference_time = 0
+        self.frames_since_inference = 0
+
+        # Statistics
+        self.frames_seen = 0
+        self.frames_scheduled = 0
+
+    def is_active(self, now=None):
+        """Check if the scene is currently considered active"""
+        now = now or time.time()
+        return now < self.active_until
+
+    def current_fps(self, now=None):
+        """Get the detection rate currently targeted"""
+        return self.active_fps if self.is_active(now) else self.idle_fps
+
+    def should_infer(self, now=None):
+        """
+        Check whether the current displayed frame is due for detection
+
+        Args:
+            now (float): Current time (default: time.time())
+
+        Returns:
+            bool: True if the frame should be sent to the model
+        """
+        now = now or time.time()
+
+        with self.lock:
+            self.frames_seen += 1
+            self.frames_since_inference += 1
+
+            if self.every_n_frames:
+                return self.frames_since_inference >= self.every_n_frames
+
+            fps = self.current_fps(now)
+            return fps > 0 and now - self.last_inference_time >= 1.0 / fps
+
+    def mark_scheduled(self, now=None):
+        """Record that a frame was actually sent to the model"""
+        with self.lock:
+            self.last_inference_time = now or time.time()
+            self.frames_since_inference = 0
+            self.frames_scheduled += 1
+
+    def update(self, scene_active, now=None):
+        """
+        Feed back the result of a detection
+
+        Args:
+            scene_active (bool): Whether the detection saw activity
+            now (float): Current time (default: time.time())
+        """
+        if scene_active:
+            with self.lock:
+                self.active_until = (now or time.time()) + self.active_hold_seconds
+
+    def get_status(self):
+        """Get scheduler statistics"""
+        with self.lock:
+            return {
+                'mode': 'every_n_frames' if self.every_n_frames else 'adaptive',
+                'active': self.is_active(),
+                'every_n_frames': self.every_n_frames,
+                'target_fps': None if self.every_n_frames else self.current_fps(),
+                'frames_seen': self.frames_seen,
+                'frames_scheduled': self.frames_scheduled,
+                'frames_skipped': self.frames_seen - self.frames_scheduled
+            }
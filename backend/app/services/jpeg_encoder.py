@@ -0,0 +1,151 @@
+"""
+JPEG Encoder - Pluggable Encoding Backend
+Uses a libjpeg-turbo binding when installed, falls back to OpenCV
+"""
+
+import cv2
+
+# Optional libjpeg-turbo bindings
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+try:
+    import turbojpeg
+except ImportError:
+    turbojpeg = None
+
+
+class JpegEncoder:
+    """
+    Encodes BGR frames to JPEG bytes
+
+    Backends (fastest first): 'simplejpeg', 'turbojpeg' (PyTurboJPEG),
+    'opencv'. 'auto' picks the first one that is installed.
+    """
+
+    BACKENDS = ('simplejpeg', 'turbojpeg', 'opencv')
+    SUBSAMPLING = ('444', '422', '420')
+
+    # Named presets: (quality, chroma subsampling, fast DCT)
+    PRESETS = {
+        'archive': {'quality': 95, 'subsampling': '444', 'fast_dct': False},
+        'balanced': {'quality': 85, 'subsampling': '420', 'fast_dct': False},
+        'fast': {'quality': 75, 'subsampling': '420', 'fast_dct': True},
+        'thumbnail': {'quality': 60, 'subsampling': '420', 'fast_dct': True}
+    }
+
+    def __init__(self, backend='auto', subsampling='420', fast_dct=True):
+        """
+        Initialize encoder
+
+        Args:
+            backend (str): 'auto', 'simplejpeg', 'turbojpeg' or 'opencv'
+            subsampling (str): Default chroma subsampling ('444', '422', '420')
+            fast_dct (bool): Use the faster, slightly less accurate DCT
+        """
+        if subsampling not in self.SUBSAMPLING:
+            raise ValueError(f"Unknown chroma subsampling: {subsampling}")
+
+        self.subsampling = subsampling
+        self.fast_dct = fast_dct
+        self.backend = self._select_backend(backend)
+
+        if self.backend == 'turbojpeg':
+            self.turbo = turbojpeg.TurboJPEG()
+            self.turbo_subsampling = {
+                '444': turbojpeg.TJSAMP_444,
+                '422': turbojpeg.TJSAMP_422,
+                '420': turbojpeg.TJSAMP_420
+            }
+
+        print(f"🖼️ JPEG encoder: {self.backend} (subsampling {subsampling})")
+
+    def _select_backend(self, backend):
+        """Resolve requested backend to one that is available"""
+        available = {
+            'simplejpeg': simplejpeg is not None,
+            'turbojpeg': turbojpeg is not None,
+            'opencv': True
+        }
+
+        if backend == 'auto':
+            return next(name for name in self.BACKENDS if available[name])
+
+        if backend not in available:
+            raise ValueError(f"Unknown JPEG backend: {backend}")
+
+        if not available[backend]:
+            print(f"⚠️ JPEG backend '{backend}' not installed, falling back to OpenCV")
+            return 'opencv'
+
+        return backend
+
+    def encode(self, frame, quality=90, subsampling=None, fast_dct=None):
+        """
+        Encode a BGR frame
+
+        Args:
+            frame: BGR image (numpy array)
+            quality (int): JPEG quality 1-100
+            subsampling (str): Chroma subsampling (default: encoder setting)
+            fast_dct (bool): Fast DCT (default: encoder setting)
+
+        Returns:
+            bytes: JPEG data
+        """
+        subsampling = subsampling or self.subsampling
+        fast_dct = self.fast_dct if fast_dct is None else fast_dct
+
+        if self.backend == 'simplejpeg':
+            if not frame.flags['C_CONTIGUOUS']:
+                frame = frame.copy()
+            return simplejpeg.encode_jpeg(
+                frame,
+                quality=quality,
+                colorspace='BGR',
+                colorsubsampling=subsampling,
+                fastdct=fast_dct
+            )
+
+        if self.backend == 'turbojpeg':
+            return self.turbo.encode(
+                frame,
+                quality=quality,
+                jpeg_subsample=self.turbo_subsampling[subsampling],
+                pixel_format=turbojpeg.TJPF_BGR,
+                flags=turbojpeg.TJFLAG_FASTDCT if fast_dct else 0
+            )
+
+        return self._encode_opencv(frame, quality, subsampling)
+
+    def _encode_opencv(self, frame, quality, subsampling):
+        """Encode with cv2.imencode (subsampling needs OpenCV 4.5.5+)"""
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+        sampling_flag = getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{subsampling}", None)
+        if sampling_flag is not None:
+            params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, sampling_flag]
+
+        _, buffer = cv2.imencode('.jpg', frame, params)
+        return buffer.tobytes()
+
+    def encode_preset(self, frame, preset='balanced'):
+        """
+        Encode a frame with a named preset
+
+        Args:
+            frame: BGR image (numpy array)
+            preset (str): Key of PRESETS
+
+        Returns:
+            bytes: JPEG data
+        """
+        settings = self.PRESETS[preset]
+        return self.encode(
+            frame,
+            quality=settings['quality'],
+            subsampling=settings['subsampling'],
+            fast_dct=settings['fast_dct']
+        )
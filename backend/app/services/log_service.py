@@ -0,0 +1,141 @@
+"""
+Log Service - Detection Log
+Bounded, structured log of threat detections that clients read incrementally
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class LogEntry:
+    """A single detection log entry"""
+
+    def __init__(self, sequence, camera_id, camera_name, threat_type, class_name=None,
+                 confidence=None, timestamp=None):
+        """
+        Initialize log entry
+
+        Args:
+            sequence (int): Monotonic entry ID
+            camera_id (int): Camera the detection came from
+            camera_name (str): Display name of the camera
+            threat_type (str): Threat type reported by the rule
+            class_name (str): Class of the detection that triggered the rule
+            confidence (float): Score of that detection
+            timestamp (float): Detection time (default: now)
+        """
+        self.sequence = sequence
+        self.camera_id = camera_id
+        self.camera_name = camera_name
+        self.threat_type = threat_type
+        self.class_name = class_name
+        self.confidence = confidence
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def message(self):
+        """Preformatted log line (as shown in the dashboards)"""
+        clock = datetime.fromtimestamp(self.timestamp).strftime('%H:%M:%S')
+        return f"[{clock}] 🚨 Threat Detected: {self.threat_type} ({self.camera_name})"
+
+    def to_dict(self):
+        """Convert to a JSON-serialisable dictionary"""
+        return {
+            'sequence': self.sequence,
+            'timestamp': self.timestamp,
+            'camera_id': self.camera_id,
+            'camera_name': self.camera_name,
+            'class_name': self.class_name,
+            'confidence': None if self.confidence is None else round(self.confidence, 3),
+            'threat_type': self.threat_type,
+            'threat': True,
+            'message': self.message
+        }
+
+
+class DetectionLog:
+    """
+    Ring of the most recent detection log entries
+
+    Entries get monotonic sequence numbers, so clients fetch only what is
+    newer than the last entry they saw. The oldest entries fall off the
+    ring once it is full.
+    """
+
+    def __init__(self, max_entries=200, event_stream=None):
+        """
+        Initialize detection log
+
+        Args:
+            max_entries (int): Entries kept in the ring
+            event_stream (EventStream): Receives a 'log' event for each new entry
+        """
+        self.entries = deque(maxlen=max_entries)
+        self.sequence = 0
+        self.lock = threading.Lock()
+        self.event_stream = event_stream
+
+        # Distinguishes this run's sequence numbers from a previous server run's
+        self.epoch = int(time.time())
+
+    def add(self, camera_id, camera_name, threat_type, class_name=None, confidence=None):
+        """
+        Append a log entry
+
+        Args:
+            camera_id (int): Camera the detection came from
+            camera_name (str): Display name of the camera
+            threat_type (str): Threat type reported by the rule
+            class_name (str): Class of the detection that triggered the rule
+            confidence (float): Score of that detection
+
+        Returns:
+            LogEntry: The new entry
+        """
+        with self.lock:
+            self.sequence += 1
+            entry = LogEntry(self.sequence, camera_id, camera_name, threat_type, class_name, confidence)
+            self.entries.append(entry)
+
+        if self.event_stream is not None:
+            self.event_stream.publish('log', entry.to_dict())
+
+        return entry
+
+    def entries_since(self, since=0, camera_id=None):
+        """
+        Get entries newer than a sequence number
+
+        Args:
+            since (int): Last sequence the client has seen
+            camera_id (int): Only entries from this camera (None = all)
+
+        Returns:
+            tuple: (entries: list, last_sequence: int, complete: bool) - complete is
+                   False if entries after `since` were already dropped from the ring
+        """
+        with self.lock:
+            last_sequence = self.sequence
+            if since > last_sequence:
+                # Client saw a previous server run: everything here is new to it
+                since, complete = 0, False
+            else:
+                oldest = self.entries[0].sequence if self.entries else last_sequence + 1
+                complete = since >= oldest - 1
+            entries = [
+                entry for entry in self.entries
+                if entry.sequence > since and (camera_id is None or entry.camera_id == camera_id)
+            ]
+
+        return entries, last_sequence, complete
+
+    def get_etag(self):
+        """
+        Entity tag for the current ring contents
+
+        A /logs response depends only on its query and the newest sequence,
+        so the tag changes exactly when an entry is added.
+        """
+        return f"{self.epoch}-{self.sequence}"
@@ -0,0 +1,205 @@
+"""
+Model Export - CPU Inference Backends
+Exports the PyTorch model to ONNX / OpenVINO, caches it and validates it
+"""
+
+import glob
+import os
+import time
+
+import numpy as np
+from ultralytics import YOLO
+
+from app.services.detections import Detections, box_iou
+
+# Optional ONNX Runtime quantization tools (INT8 ONNX models)
+try:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except ImportError:
+    quantize_dynamic = None
+
+
+class ModelExporter:
+    """
+    Produces and checks a faster inference artifact for a .pt model
+
+    Artifacts are written next to the model and reused while they are newer
+    than the .pt file:
+
+        best.onnx                 ONNX (FP32)
+        best_int8.onnx            ONNX, dynamically quantized weights
+        best_openvino_model/      OpenVINO IR (FP32)
+        best_int8_openvino_model/ OpenVINO IR, NNCF post-training INT8
+    """
+
+    BACKENDS = ('pytorch', 'onnx', 'openvino')
+
+    def __init__(self, model_path, backend='onnx', int8=False, inference_size=480,
+                 calibration_data=None):
+        """
+        Initialize exporter
+
+        Args:
+            model_path (str): Path to the PyTorch model (.pt)
+            backend (str): 'pytorch', 'onnx' or 'openvino'
+            int8 (bool): Export an INT8-quantized variant
+            inference_size (int): Image size the artifact is exported for
+            calibration_data (str): Dataset YAML for OpenVINO INT8 calibration
+                                    (default: Ultralytics' sample dataset)
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown model backend: {backend}")
+
+        if backend == 'onnx' and int8 and quantize_dynamic is None:
+            # Use (and cache) the FP32 export instead of re-exporting every start
+            print("⚠️ onnxruntime quantization not installed, using the FP32 ONNX model")
+            int8 = False
+
+        self.model_path = model_path
+        self.backend = backend
+        self.int8 = int8
+        self.inference_size = inference_size
+        self.calibration_data = calibration_data
+
+    def get_artifact_path(self):
+        """Path of the exported model for the configured backend"""
+        stem, _ = os.path.splitext(self.model_path)
+
+        if self.backend == 'pytorch':
+            return self.model_path
+        if self.backend == 'onnx':
+            return f"{stem}_int8.onnx" if self.int8 else f"{stem}.onnx"
+        return f"{stem}_int8_openvino_model" if self.int8 else f"{stem}_openvino_model"
+
+    def is_cached(self):
+        """Check if an up-to-date artifact already exists"""
+        path = self.get_artifact_path()
+        return (os.path.exists(path) and
+                os.path.getmtime(path) >= os.path.getmtime(self.model_path))
+
+    def export(self):
+        """
+        Export the model unless a cached artifact is up to date
+
+        Returns:
+            str: Path to the model to load
+        """
+        path = self.get_artifact_path()
+
+        if self.backend == 'pytorch':
+            return path
+
+        if self.is_cached():
+            print(f"📦 Using cached {self.backend} model: {path}")
+            return path
+
+        print(f"⏳ Exporting {self.model_path} to {self.backend}{' (INT8)' if self.int8 else ''}...")
+        model = YOLO(self.model_path)
+
+        if self.backend == 'onnx':
+            exported = model.export(format='onnx', imgsz=self.inference_size, dynamic=True, simplify=True)
+            if self.int8:
+                exported = self._quantize_onnx(exported, path)
+        else:
+            options = {}
+            if self.int8:
+                options['int8'] = True
+                if self.calibration_data:
+                    options['data'] = self.calibration_data
+            exported = model.export(format='openvino', imgsz=self.inference_size, dynamic=True, **options)
+
+        print(f"✅ Exported model: {exported}")
+        return exported
+
+    def _quantize_onnx(self, source_path, output_path):
+        """Quantize ONNX weights to INT8 with ONNX Runtime"""
+        quantize_dynamic(source_path, output_path, weight_type=QuantType.QUInt8)
+        return output_path
+
+    @staticmethod
+    def get_validation_images(folder=None):
+        """
+        Images used to compare backends
+
+        Generic samples (e.g. Ultralytics' COCO images) hold none of a custom
+        model's classes, so only frames from the deployment are useful.
+
+        Args:
+            folder (str): Folder of sample frames
+
+        Returns:
+            list: Image paths (empty if no folder is configured)
+        """
+        if folder is None:
+            return []
+
+        images = []
+        for pattern in ('*.jpg', '*.jpeg', '*.png'):
+            images.extend(glob.glob(os.path.join(folder, pattern)))
+        return sorted(images)
+
+    def validate(self, reference, candidate, class_names, images, conf_threshold=0.15,
+                 iou_threshold=0.5):
+        """
+        Compare detections of an exported model against the PyTorch model
+
+        A reference box counts as reproduced if the candidate has a box of the
+        same class overlapping it by at least iou_threshold. Both models run
+        once before timing, so latencies exclude their one-off warm-up.
+
+        Args:
+            reference: PyTorch YOLO model
+            candidate: Exported YOLO model
+            class_names (dict): Class ID → display name
+            images (list): Image paths to compare on
+            conf_threshold (float): Confidence threshold for both models
+            iou_threshold (float): Minimum IoU for two boxes to agree
+
+        Returns:
+            dict: Agreement ratio (None if neither model detected anything),
+                  box counts and mean latency of both models
+        """
+        matched = 0
+        reference_boxes = 0
+        candidate_boxes = 0
+        reference_time = 0.0
+        candidate_time = 0.0
+
+        for model in (reference, candidate) if images else ():
+            model(images[0], imgsz=self.inference_size, conf=conf_threshold, verbose=False)
+
+        for image in images:
+            start = time.time()
+            expected = Detections.from_results(
+                reference(image, imgsz=self.inference_size, conf=conf_threshold, verbose=False), class_names)
+            reference_time += time.time() - start
+
+            start = time.time()
+            actual = Detections.from_results(
+                candidate(image, imgsz=self.inference_size, conf=conf_threshold, verbose=False), class_names)
+            candidate_time += time.time() - start
+
+            reference_boxes += len(expected)
+            candidate_boxes += len(actual)
+            matched += self._count_matches(expected, actual, iou_threshold)
+
+        total = max(reference_boxes, candidate_boxes)
+        count = max(len(images), 1)
+        return {
+            'images': len(images),
+            'agreement': matched / total if total else None,
+            'reference_boxes': reference_boxes,
+            'candidate_boxes': candidate_boxes,
+            'reference_latency_ms': round(reference_time / count * 1000, 1),
+            'candidate_latency_ms': round(candidate_time / count * 1000, 1)
+        }
+
+    @staticmethod
+    def _count_matches(expected, actual, iou_threshold):
+        """Count reference boxes reproduced by the candidate (same class, enough IoU)"""
+        if len(expected) == 0 or len(actual) == 0:
+            return 0
+
+        iou = box_iou(expected.xyxy, actual.xyxy)
+        iou[expected.class_id[:, None] != actual.class_id[None, :]] = 0
+        return int(np.sum(iou.max(axis=1) >= iou_threshold))
@@ -0,0 +1,130 @@
+"""
+Motion Detector - Cheap Pre-Inference Gate
+Compares downscaled frames against a running background to skip static scenes
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionDetector:
+    """
+    Frame-differencing motion gate for one camera
+
+    Each checked frame is shrunk to a small greyscale image and compared
+    with a running-average background, so slow lighting changes are absorbed
+    while moving objects are not. A frame passes the gate if enough pixels
+    changed, or if no frame has passed for force_interval seconds.
+    """
+
+    def __init__(self, sensitivity=0.005, pixel_threshold=25, downscale_width=160,
+                 background_rate=0.05, force_interval=10, mask=None):
+        """
+        Initialize motion detector
+
+        Args:
+            sensitivity (float): Fraction of (unmasked) pixels that must change
+            pixel_threshold (int): Minimum grey-level change for a pixel to count
+            downscale_width (int): Width of the comparison image
+            background_rate (float): Running-average weight of each new frame
+            force_interval (float): Force a pass after this many seconds (0 = never)
+            mask (list): Ignored zones, as polygons of normalised [x, y] points
+        """
+        self.sensitivity = sensitivity
+        self.pixel_threshold = pixel_threshold
+        self.downscale_width = downscale_width
+        self.background_rate = background_rate
+        self.force_interval = force_interval
+        self.mask_polygons = mask or []
+
+        self.lock = threading.Lock()
+        self.background = None
+        self.mask = None
+        self.last_pass_time = 0
+
+        # Statistics
+        self.frames_checked = 0
+        self.motion_frames = 0
+        self.forced_frames = 0
+        self.frames_skipped = 0
+        self.last_score = 0.0
+
+    def _prepare(self, frame):
+        """Downscale, greyscale and blur a frame for comparison"""
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / width
+        small = cv2.resize(frame, (self.downscale_width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _build_mask(self, shape):
+        """Rasterise ignored zones into a mask of pixels to compare"""
+        height, width = shape
+        mask = np.full((height, width), 255, dtype=np.uint8)
+
+        for polygon in self.mask_polygons:
+            points = np.array([[x * width, y * height] for x, y in polygon], dtype=np.int32)
+            cv2.fillPoly(mask, [points], 0)
+
+        return mask
+
+    def check(self, frame, now=None):
+        """
+        Check whether a frame should be sent to the model
+
+        Args:
+            frame: BGR frame (numpy array), not modified
+            now (float): Current time (default: time.time())
+
+        Returns:
+            bool: True if motion was detected or a forced pass is due
+        """
+        now = now or time.time()
+        gray = self._prepare(frame)
+
+        with self.lock:
+            self.frames_checked += 1
+
+            if self.background is None or self.background.shape != gray.shape:
+                # First frame: nothing to compare with yet
+                self.background = gray.astype(np.float32)
+                self.mask = self._build_mask(gray.shape)
+                self.last_pass_time = now
+                return True
+
+            delta = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+            _, changed = cv2.threshold(delta, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+            changed = cv2.bitwise_and(changed, self.mask)
+
+            area = cv2.countNonZero(self.mask)
+            self.last_score = cv2.countNonZero(changed) / area if area else 0.0
+
+            cv2.accumulateWeighted(gray, self.background, self.background_rate)
+
+            if self.last_score >= self.sensitivity:
+                self.motion_frames += 1
+            elif self.force_interval and now - self.last_pass_time >= self.force_interval:
+                self.forced_frames += 1
+            else:
+                self.frames_skipped += 1
+                return False
+
+            self.last_pass_time = now
+            return True
+
+    def get_status(self):
+        """Get motion gate statistics"""
+        with self.lock:
+            return {
+                'sensitivity': self.sensitivity,
+                'masked_zones': len(self.mask_polygons),
+                'frames_checked': self.frames_checked,
+                'motion_frames': self.motion_frames,
+                'forced_frames': self.forced_frames,
+                'frames_skipped': self.frames_skipped,
+                'last_score': round(self.last_score, 4)
+            }
@@ -0,0 +1,459 @@
+"""
+Pipeline Service - Shared Vision Pipeline
+Runs capture, inference, annotation and encoding once per camera
+and broadcasts the result to every stream subscriber
+"""
+
+import cv2
+import threading
+import time
+
+from app.services.threat_logic import ThreatLogic, ThreatPersistence
+from app.services.jpeg_encoder import JpegEncoder
+from app.services.inference_scheduler import InferenceScheduler
+
+
+class FrameBroadcaster:
+    """Latest-frame slot that any number of subscribers can wait on"""
+
+    def __init__(self):
+        """Initialize empty broadcast slot"""
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.payload = None
+
+    def publish(self, payload):
+        """
+        Publish a new payload and wake all waiting subscribers
+
+        Args:
+            payload: Object shared with all subscribers (not copied)
+        """
+        with self.condition:
+            self.sequence += 1
+            self.payload = payload
+            self.condition.notify_all()
+
+    def wait_for_next(self, last_sequence, timeout=1.0):
+        """
+        Block until a payload newer than last_sequence is available
+
+        Args:
+            last_sequence (int): Sequence number the caller already has
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            tuple: (sequence, payload) - payload is None on timeout
+        """
+        with self.condition:
+            if self.sequence <= last_sequence:
+                self.condition.wait(timeout)
+
+            if self.sequence <= last_sequence:
+                return last_sequence, None
+
+            return self.sequence, self.payload
+
+
+class VisionPipeline:
+    """
+    Background pipeline for a single camera
+
+    Each captured frame is read, annotated and JPEG-encoded exactly once,
+    no matter how many clients are watching the stream. Stream tiers
+    (resolution + quality) are encoded only while they have subscribers,
+    and each encoded frame is shared by all of them.
+
+    Display and detection are decoupled: the display loop runs at camera
+    rate and draws the most recent detections, while a detection worker
+    analyses the frames the inference scheduler picks.
+    """
+
+    # Used when no tiers are configured: full size, OpenCV default quality
+    DEFAULT_TIERS = {'full': {'width': None, 'quality': 95}}
+
+    def __init__(self, camera_service, yolo_service, recorder_service, threat_handler=None, camera_id=0,
+                 inference_service=None, annotate_stream=True, annotate_recordings=True,
+                 annotate_snapshots=True, stream_tiers=None, default_tier=None, jpeg_encoder=None,
+                 scheduler=None, motion_detector=None, tracker=None, threat_persistence=None,
+                 threat_logic=None):
+        """
+        Initialize vision pipeline
+
+        Args:
+            camera_service: Camera service instance
+            yolo_service: YOLO service instance
+            recorder_service: Recorder service instance (ring buffer)
+            threat_handler (callable): Called as threat_handler(frame, threat_type)
+            camera_id (int): Camera ID this pipeline serves
+            inference_service: Object providing run_inference(frame), e.g. a
+                               BatchInferenceService (default: yolo_service)
+            annotate_stream (bool): Draw detections on the MJPEG stream
+            annotate_recordings (bool): Draw detections on recorded video
+            annotate_snapshots (bool): Draw detections on Telegram snapshots
+            stream_tiers (dict): {name: {'width': int or None, 'quality': int}}
+            default_tier (str): Tier served when a client does not pick one
+            jpeg_encoder (JpegEncoder): Shared JPEG encoder (OpenCV if None)
+            scheduler (InferenceScheduler): Picks frames for detection
+                                            (default: whenever the worker is free)
+            motion_detector (MotionDetector): Skips detection while the scene is static
+            tracker (ObjectTracker): Tracks objects and predicts boxes between detections
+            threat_persistence (ThreatPersistence): K-of-M confirmation of threats
+                                                    (default: every threat frame alerts)
+            threat_logic (ThreatLogic): Compiled threat rules (default: built-in rules)
+        """
+        self.camera_service = camera_service
+        self.yolo_service = yolo_service
+        self.recorder_service = recorder_service
+        self.threat_handler = threat_handler
+        self.camera_id = camera_id
+        self.inference_service = inference_service or yolo_service
+        self.jpeg_encoder = jpeg_encoder or JpegEncoder(backend='opencv')
+        self.scheduler = scheduler or InferenceScheduler(every_n_frames=1)
+        self.motion_detector = motion_detector
+        self.tracker = tracker
+        self.threat_persistence = threat_persistence or ThreatPersistence(required=1, window=1)
+        self.threat_logic = threat_logic or ThreatLogic(yolo_service.class_names)
+
+        # Annotation choices per consumer
+        self.annotate_stream = annotate_stream
+        self.annotate_recordings = annotate_recordings
+        self.annotate_snapshots = annotate_snapshots
+        self.annotate_display = annotate_stream or annotate_recordings
+        # Overlays can be drawn straight onto the captured frame unless
+        # a display consumer still needs the raw image (snapshots use the
+        # detection worker's own copy)
+        self.needs_raw = self.annotate_display and not (annotate_stream and annotate_recordings)
+
+        # Encoded JPEG frames for stream subscribers, one slot per tier
+        self.stream_tiers = stream_tiers or self.DEFAULT_TIERS
+        self.default_tier = default_tier if default_tier in self.stream_tiers else next(iter(self.stream_tiers))
+        self.tier_broadcasters = {name: FrameBroadcaster() for name in self.stream_tiers}
+        self.tier_subscribers = {name: 0 for name in self.stream_tiers}
+
+        # Recording frames (BGR) for in-process consumers (alert/segment recorders)
+        self.frame_broadcaster = FrameBroadcaster()
+
+        # Worker thread state
+        self.running = False
+        self.thread = None
+        self.last_sequence = 0
+
+        # Detection worker: one pending frame slot, latest finished detections
+        self.detect_thread = None
+        self.detect_condition = threading.Condition()
+        self.detect_pending = None
+        self.detect_busy = False
+        self.last_detections = None
+
+        # Statistics
+        self.stats_lock = threading.Lock()
+        self.frames_processed = 0
+        self.detections_run = 0
+        self.last_frame_time = 0
+        self.last_latency = 0
+
+    def set_threat_handler(self, threat_handler):
+        """Register callback invoked when a threat is detected"""
+        self.threat_handler = threat_handler
+
+    def start(self):
+        """Start the background pipeline thread"""
+        if self.running:
+            return
+
+        # Pipeline always works on the newest frame from the capture thread
+        self.camera_service.start_capture()
+
+        self.running = True
+        self.detect_thread = threading.Thread(target=self._detect_loop, daemon=True)
+        self.detect_thread.start()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"✅ Vision pipeline started (camera: {self.camera_id})")
+
+    def stop(self, timeout=2.0):
+        """Stop the display loop and detection worker"""
+        with self.detect_condition:
+            self.running = False
+            self.detect_condition.notify_all()
+
+        for thread in (self.thread, self.detect_thread):
+            if thread is not None:
+                thread.join(timeout)
+        self.thread = None
+        self.detect_thread = None
+
+    def _run(self):
+        """Display loop: capture → schedule detection → annotate → buffer → encode → broadcast"""
+        while self.running:
+            try:
+                self.process_frame()
+            except Exception as e:
+                print(f"❌ Vision pipeline error: {e}")
+                time.sleep(0.1)
+
+    def process_frame(self):
+        """
+        Display one camera frame, using the latest available detections
+
+        Returns:
+            bool: True if a frame was processed and published
+        """
+        sequence, captured_at, frame = self.camera_service.read_latest(self.last_sequence)
+
+        if frame is None:
+            return False
+
+        self.last_sequence = sequence
+
+        # Hand a clean copy to the detection worker when it is due, something
+        # moved and the worker is free
+        now = time.time()
+        if (self.scheduler.should_infer(now) and self._motion_gate(frame, now) and
+                self._submit_detection(frame, captured_at)):
+            self.scheduler.mark_scheduled(now)
+
+        # Between detections, draw the tracker's predicted boxes
+        detections = self.last_detections
+        if self.tracker is not None and detections is not None:
+            detections = self.tracker.predict(captured_at)
+
+        # Render overlays once, in place where no consumer wants the raw frame
+        if self.annotate_display and detections is not None:
+            canvas = frame.copy() if self.needs_raw else frame
+            annotated_frame = self.yolo_service.annotator.render(canvas, detections)
+        else:
+            annotated_frame = frame
+
+        stream_frame = annotated_frame if self.annotate_stream else frame
+        record_frame = annotated_frame if self.annotate_recordings else frame
+
+        # Encode each watched tier once and share with all of its subscribers
+        encoded_tiers = self._encode_tiers(stream_frame)
+
+        # Add to ring buffer (reuse a full-size stream JPEG when it shows the same image)
+        self.recorder_service.add_frame_to_buffer(
+            record_frame,
+            encoded=encoded_tiers.get(None) if record_frame is stream_frame else None
+        )
+
+        # Share the processed frame with the recorders
+        self.frame_broadcaster.publish(record_frame)
+
+        for name, frame_bytes in encoded_tiers.items():
+            if name is not None:
+                self.tier_broadcasters[name].publish(frame_bytes)
+
+        with self.stats_lock:
+            self.frames_processed += 1
+            self.last_frame_time = time.time()
+
+        return True
+
+    def _motion_gate(self, frame, now):
+        """
+        Check whether a due frame is worth running the model on
+
+        The gate only applies to quiet scenes; while the scheduler considers
+        the scene active, people standing still are still tracked.
+        """
+        if self.motion_detector is None or self.scheduler.is_active(now):
+            return True
+        return self.motion_detector.check(frame, now)
+
+    def _submit_detection(self, frame, captured_at):
+        """
+        Queue a frame for the detection worker if it is idle
+
+        Returns:
+            bool: True if the frame was accepted
+        """
+        with self.detect_condition:
+            if self.detect_busy or self.detect_pending is not None:
+                return False
+            # Copy before overlays are drawn onto the displayed frame
+            self.detect_pending = (frame.copy(), captured_at)
+            self.detect_condition.notify()
+            return True
+
+    def _detect_loop(self):
+        """Detection worker: inference → threat check, for each scheduled frame"""
+        while self.running:
+            with self.detect_condition:
+                while self.running and self.detect_pending is None:
+                    self.detect_condition.wait(0.5)
+                if not self.running:
+                    break
+                frame, captured_at = self.detect_pending
+                self.detect_pending = None
+                self.detect_busy = True
+
+            try:
+                self.run_detection(frame, captured_at)
+            except Exception as e:
+                print(f"❌ Detection error (camera {self.camera_id}): {e}")
+                time.sleep(0.1)
+            finally:
+                with self.detect_condition:
+                    self.detect_busy = False
+
+    def run_detection(self, frame, captured_at):
+        """
+        Run inference on a frame and act on the result
+
+        Args:
+            frame: BGR frame owned by the caller (annotated in place for snapshots)
+            captured_at (float): Capture timestamp of the frame
+        """
+        results = self.inference_service.run_inference(frame)
+        detections = self.yolo_service.get_detections(results)
+        if self.tracker is not None:
+            detections = self.tracker.update(detections, captured_at)
+        self.last_detections = detections
+
+        now = time.time()
+        self.scheduler.update(self.threat_logic.is_scene_active(detections), now)
+
+        with self.stats_lock:
+            self.detections_run += 1
+            # Glass-to-detection latency for this frame
+            self.last_latency = now - captured_at
+
+        # Check for threats (only on fresh detections), confirmed over several frames
+        _, threat_type = self.threat_logic.check_threat_conditions(detections)
+        is_threat, threat_type = self.threat_persistence.update(threat_type)
+
+        if is_threat and self.threat_handler is not None:
+            if self.annotate_snapshots:
+                frame = self.yolo_service.annotator.render(frame, detections)
+            self.threat_handler(frame, threat_type)
+
+    def _encode_tiers(self, frame):
+        """
+        JPEG-encode the frame for every tier that has subscribers
+
+        Args:
+            frame: BGR frame to stream
+
+        Returns:
+            dict: {tier_name: bytes}, plus key None for a full-size encode if one was made
+        """
+        with self.stats_lock:
+            active = [name for name, count in self.tier_subscribers.items() if count > 0]
+
+        encoded = {}
+        resized = {}
+        height, width = frame.shape[:2]
+
+        for name in active:
+            tier = self.stream_tiers[name]
+            tier_width = tier.get('width')
+
+            if tier_width and tier_width < width:
+                # Tiers of the same width share one resize
+                if tier_width not in resized:
+                    tier_height = int(height * tier_width / width)
+                    resized[tier_width] = cv2.resize(frame, (tier_width, tier_height),
+                                                     interpolation=cv2.INTER_AREA)
+                image = resized[tier_width]
+            else:
+                image = frame
+
+            encoded[name] = self.jpeg_encoder.encode(image, quality=tier.get('quality', 95))
+
+            if image is frame and None not in encoded:
+                encoded[None] = encoded[name]
+
+        return encoded
+
+    def resolve_tier(self, tier=None, width=None):
+        """
+        Pick the stream tier for a client request
+
+        Args:
+            tier (str): Tier name
+            width (int): Requested width - smallest tier at least this wide
+
+        Returns:
+            str: Tier name, or None if the requested tier does not exist
+        """
+        if tier is not None:
+            return tier if tier in self.stream_tiers else None
+
+        if width is not None:
+            candidates = sorted(
+                self.stream_tiers.items(),
+                key=lambda item: item[1].get('width') or float('inf')
+            )
+            for name, settings in candidates:
+                if (settings.get('width') or float('inf')) >= width:
+                    return name
+            return candidates[-1][0]
+
+        return self.default_tier
+
+    def wait_for_frame(self, last_sequence, timeout=1.0):
+        """
+        Block until an annotated frame newer than last_sequence is available
+
+        Args:
+            last_sequence (int): Sequence number the caller already has
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            tuple: (sequence, frame) - frame is None on timeout
+        """
+        return self.frame_broadcaster.wait_for_next(last_sequence, timeout)
+
+    def get_frame_sequence(self):
+        """Get sequence number of the most recent annotated frame"""
+        with self.frame_broadcaster.condition:
+            return self.frame_broadcaster.sequence
+
+    def subscribe(self, tier=None, timeout=1.0):
+        """
+        Generator yielding each newly encoded JPEG frame
+
+        Args:
+            tier (str): Stream tier name (default tier if None)
+            timeout (float): Seconds to wait for a frame before re-checking
+
+        Yields:
+            bytes: JPEG-encoded annotated frame
+        """
+        tier = tier or self.default_tier
+        broadcaster = self.tier_broadcasters[tier]
+
+        with self.stats_lock:
+            self.tier_subscribers[tier] += 1
+            # Skip whatever this tier held before it had viewers again
+            sequence = broadcaster.sequence if self.tier_subscribers[tier] == 1 else 0
+
+        try:
+            while True:
+                sequence, frame_bytes = broadcaster.wait_for_next(sequence, timeout)
+                if frame_bytes is not None:
+                    yield frame_bytes
+        finally:
+            with self.stats_lock:
+                self.tier_subscribers[tier] -= 1
+
+    def get_status(self):
+        """Get pipeline status"""
+        with self.stats_lock:
+            return {
+                'camera_id': self.camera_id,
+                'camera_index': self.camera_service.camera_index,
+                'running': self.running,
+                'subscribers': sum(self.tier_subscribers.values()),
+                'tier_subscribers': dict(self.tier_subscribers),
+                'frames_processed': self.frames_processed,
+                'detections_run': self.detections_run,
+                'scheduler': self.scheduler.get_status(),
+                'motion': self.motion_detector.get_status() if self.motion_detector else None,
+                'tracker': self.tracker.get_status() if self.tracker else None,
+                'last_frame_time': self.last_frame_time,
+                'last_latency': self.last_latency,
+                'capture': self.camera_service.get_capture_stats()
+            }
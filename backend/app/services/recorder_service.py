@@ -4,6 +4,7 @@ Manages ring buffer and pre/post-event video recording
 """
 
 import cv2
+import numpy as np
 import os
 import time
 import threading
@@ -14,7 +15,14 @@ from datetime import datetime
 class RecorderService:
     """Manages forensic video recording with ring buffer"""
     
-    def __init__(self, alert_folder, pre_event_seconds=5, post_event_seconds=5, estimated_fps=20):
+    # Pre-event buffer storage modes
+    BUFFER_MODES = ('raw', 'jpeg', 'array')
+    
+    # Extra seconds to wait for post-event frames before saving what was collected
+    POST_EVENT_GRACE = 5.0
+    
+    def __init__(self, alert_folder, pre_event_seconds=5, post_event_seconds=5, record_fps=15, camera_id=0,
+                 buffer_mode='raw', jpeg_quality=90, jpeg_encoder=None):
         """
         Initialize recorder service
         
@@ -22,17 +30,41 @@ class RecorderService:
             alert_folder (str): Folder to save alert videos
             pre_event_seconds (int): Seconds to record before event
             post_event_seconds (int): Seconds to record after event
-            estimated_fps (int): Estimated camera FPS
+            record_fps (int): Frame rate of alert clips; frames are sampled into
+                              the ring buffer at this rate whatever the camera delivers
+            camera_id (int): Camera this recorder belongs to
+            buffer_mode (str): 'raw' keeps BGR frame copies, 'jpeg' keeps encoded JPEG bytes,
+                               'array' writes BGR frames into one preallocated array
+            jpeg_quality (int): JPEG quality when the recorder encodes frames itself
+            jpeg_encoder (JpegEncoder): Shared JPEG encoder (OpenCV if None)
         """
+        if buffer_mode not in self.BUFFER_MODES:
+            raise ValueError(f"Unknown buffer mode: {buffer_mode}")
+        
         self.alert_folder = alert_folder
+        self.camera_id = camera_id
         self.pre_event_seconds = pre_event_seconds
         self.post_event_seconds = post_event_seconds
-        self.estimated_fps = estimated_fps
+        self.record_fps = record_fps
+        self.frame_interval = 1.0 / record_fps
+        self.next_buffer_time = 0.0
+        self.buffer_mode = buffer_mode
+        self.jpeg_quality = jpeg_quality
+        self.jpeg_encoder = jpeg_encoder
         
         # Ring buffer for pre-event recording
-        buffer_size = int(estimated_fps * pre_event_seconds)
+        buffer_size = int(record_fps * pre_event_seconds)
+        self.buffer_size = buffer_size
         self.frame_buffer = deque(maxlen=buffer_size)
         self.buffer_lock = threading.Lock()
+        self.buffer_bytes = 0
+        
+        # 'array' mode: (N, H, W, 3) slots allocated on the first frame,
+        # slot_sequence[i] holds the frame number stored in slot i
+        self.frame_array = None
+        self.slot_sequence = None
+        self.write_cursor = 0
+        self.frames_written = 0
         
         # Recording state
         self.is_recording = False
@@ -40,17 +72,160 @@ class RecorderService:
         self.last_alert_time = 0
         self.cooldown_seconds = 5
         
-        print(f"📹 Ring Buffer Size: ~{buffer_size} frames")
+        # Continuous recording: clips are cut from disk segments when attached
+        self.segment_recorder = None
+        self.clip_end_time = 0
+        
+        print(f"📹 Ring Buffer Size: ~{buffer_size} frames at {record_fps} fps ({buffer_mode})")
     
-    def add_frame_to_buffer(self, frame):
+    def add_frame_to_buffer(self, frame, encoded=None):
         """
         Add annotated frame to ring buffer
         
+        Frames arriving faster than record_fps are dropped, so the ring
+        always covers pre_event_seconds of real time.
+        
         Args:
             frame: Annotated frame (numpy array)
+            encoded (bytes): Same frame already JPEG-encoded (reused in 'jpeg' mode)
         """
+        now = time.time()
+        if now < self.next_buffer_time:
+            return
+        self.next_buffer_time = max(self.next_buffer_time + self.frame_interval, now)
+        
+        if self.buffer_mode == 'array':
+            self._write_array_slot(frame)
+            return
+        
+        if self.buffer_mode == 'jpeg':
+            if encoded is None:
+                if self.jpeg_encoder is not None:
+                    encoded = self.jpeg_encoder.encode(frame, quality=self.jpeg_quality)
+                else:
+                    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    encoded = buffer.tobytes()
+            item = encoded
+            item_size = len(encoded)
+        else:
+            item = frame.copy()
+            item_size = item.nbytes
+        
+        with self.buffer_lock:
+            if len(self.frame_buffer) == self.frame_buffer.maxlen:
+                self.buffer_bytes -= self._item_size(self.frame_buffer[0])
+            self.frame_buffer.append(item)
+            self.buffer_bytes += item_size
+    
+    def _write_array_slot(self, frame):
+        """Copy a frame in place into the next preallocated slot"""
         with self.buffer_lock:
-            self.frame_buffer.append(frame.copy())
+            if self.frame_array is None or self.frame_array.shape[1:] != frame.shape:
+                # First frame or resolution change: (re)allocate all slots once
+                self.frame_array = np.empty((self.buffer_size,) + frame.shape, dtype=frame.dtype)
+                self.slot_sequence = np.full(self.buffer_size, -1, dtype=np.int64)
+                self.buffer_bytes = self.frame_array.nbytes
+            
+            np.copyto(self.frame_array[self.write_cursor], frame)
+            self.slot_sequence[self.write_cursor] = self.frames_written
+            self.frames_written += 1
+            self.write_cursor = self.frames_written % self.buffer_size
+    
+    def _buffer_length(self):
+        """Number of frames currently held (call with buffer_lock held)"""
+        if self.buffer_mode == 'array':
+            if self.slot_sequence is None:
+                return 0
+            return int(np.count_nonzero(self.slot_sequence >= 0))
+        return len(self.frame_buffer)
+    
+    def _snapshot_buffer(self):
+        """
+        Capture the current pre-event frames (call with buffer_lock held)
+        
+        Returns:
+            list or range: Buffered items, or frame numbers in 'array' mode
+        """
+        if self.buffer_mode == 'array':
+            count = self._buffer_length()
+            return range(self.frames_written - count, self.frames_written)
+        return list(self.frame_buffer)
+    
+    def _write_snapshot(self, video_writer, snapshot):
+        """
+        Write snapshot frames to the video writer, oldest first
+        
+        In 'array' mode each frame is copied out of its slot under the lock
+        and encoded after releasing it, so the capture side never waits on
+        the encoder; a slot already overwritten by the capture side is skipped.
+        
+        Returns:
+            int: Number of frames written
+        """
+        if self.buffer_mode != 'array':
+            for item in snapshot:
+                video_writer.write(self._decode_item(item))
+            return len(snapshot)
+        
+        frame = None
+        written = 0
+        for sequence in snapshot:
+            with self.buffer_lock:
+                index = sequence % self.buffer_size
+                if self.slot_sequence[index] != sequence:
+                    continue
+                if frame is None or frame.shape != self.frame_array.shape[1:]:
+                    frame = np.empty_like(self.frame_array[index])
+                np.copyto(frame, self.frame_array[index])
+            video_writer.write(frame)
+            written += 1
+        return written
+    
+    def _snapshot_frame_size(self, snapshot):
+        """Get (width, height) of the frames in a snapshot"""
+        if self.buffer_mode == 'array':
+            with self.buffer_lock:
+                height, width = self.frame_array.shape[1:3]
+        else:
+            height, width = self._decode_item(snapshot[0]).shape[:2]
+        return width, height
+    
+    @staticmethod
+    def _item_size(item):
+        """Memory used by one buffered frame"""
+        return len(item) if isinstance(item, bytes) else item.nbytes
+    
+    @staticmethod
+    def _decode_item(item):
+        """Turn a buffered item back into a BGR frame"""
+        if isinstance(item, bytes):
+            return cv2.imdecode(np.frombuffer(item, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return item
+    
+    def attach_segment_recorder(self, segment_recorder):
+        """
+        Build alert clips from continuous recording segments
+        
+        Args:
+            segment_recorder: SegmentRecorder for this camera
+        """
+        self.segment_recorder = segment_recorder
+    
+    def extend_recording(self):
+        """
+        Extend the clip being recorded to cover a new detection
+        
+        Only has an effect with continuous recording, where footage for
+        the extended window is already being written to disk.
+        
+        Returns:
+            bool: True if the running clip was extended
+        """
+        if not self.is_recording or self.segment_recorder is None:
+            return False
+        
+        self.clip_end_time = time.time() + self.post_event_seconds
+        return True
     
     def can_record(self):
         """
@@ -68,14 +243,17 @@ class RecorderService:
         
         return True
     
-    def record_alert_video(self, threat_type, camera_service, yolo_service):
+    def record_alert_video(self, threat_type, pipeline):
         """
         Record forensic alert video (pre + post event)
         
+        Post-event frames are taken from the vision pipeline, which has
+        already run inference and annotation on them - recording adds no
+        extra inference load.
+        
         Args:
             threat_type (str): Type of threat detected
-            camera_service: Camera service instance
-            yolo_service: YOLO service instance
+            pipeline: Vision pipeline producing annotated frames for this camera
             
         Returns:
             str: Path to saved video file, or None if failed
@@ -86,47 +264,64 @@ class RecorderService:
         try:
             # Generate filename
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            video_filename = f"alert_{threat_type.replace(' ', '_')}_{timestamp}.mp4"
+            video_filename = f"alert_cam{self.camera_id}_{threat_type.replace(' ', '_')}_{timestamp}.mp4"
             video_path = os.path.join(self.alert_folder, video_filename)
             
             print(f"🎥 Starting forensic recording: {video_filename}")
             
+            if self.segment_recorder is not None:
+                video_path = self._record_from_segments(video_path)
+                self.last_alert_time = time.time()
+                return video_path
+            
             # Get pre-event frames from buffer
             with self.buffer_lock:
-                pre_frames = list(self.frame_buffer)
+                pre_frames = self._snapshot_buffer()
+                sequence = pipeline.get_frame_sequence()
             
             if len(pre_frames) == 0:
                 print("⚠️ No pre-event frames in buffer!")
                 return None
             
             # Initialize video writer
-            height, width = pre_frames[0].shape[:2]
+            width, height = self._snapshot_frame_size(pre_frames)
             fourcc = cv2.VideoWriter_fourcc(*'x264')  # H.264 codec - plays in all browsers!
-            fps = max(self.estimated_fps, 15)
+            fps = self.record_fps
             video_writer = cv2.VideoWriter(video_path, fourcc, fps, (width, height))
             
             # Write pre-event frames
             print(f"📹 Writing {len(pre_frames)} pre-event frames WITH ANNOTATIONS...")
-            for frame in pre_frames:
-                video_writer.write(frame)
+            written = self._write_snapshot(video_writer, pre_frames)
+            if written < len(pre_frames):
+                print(f"⚠️ {len(pre_frames) - written} pre-event frames overwritten before write")
             
-            # Record post-event frames
+            # Record post-event frames at a constant rate (repeat or drop frames
+            # against the clock, so the clip plays back in real time)
             post_frames_needed = int(fps * self.post_event_seconds)
             post_frames_count = 0
+            post_start = time.time()
+            post_deadline = post_start + self.post_event_seconds + self.POST_EVENT_GRACE
             
             print(f"📹 Recording {self.post_event_seconds}s post-event ({post_frames_needed} frames)...")
             
             while post_frames_count < post_frames_needed:
-                success, frame = camera_service.read_frame()
+                remaining = post_deadline - time.time()
+                if remaining <= 0:
+                    # Camera stalled: keep the clip with the frames collected so far
+                    print(f"⚠️ No frames from camera {self.camera_id}, ending recording early "
+                          f"({post_frames_count}/{post_frames_needed} post-event frames)")
+                    break
                 
-                if success:
-                    # Run YOLO and annotate
-                    results = yolo_service.run_inference(frame)
-                    annotated_frame = yolo_service.annotate_frame(results)
-                    video_writer.write(annotated_frame)
-                    post_frames_count += 1
-                else:
-                    time.sleep(0.01)
+                sequence, annotated_frame = pipeline.wait_for_frame(sequence, timeout=min(1.0, remaining))
+                
+                if annotated_frame is not None:
+                    target_frames = min(int((time.time() - post_start) * fps) + 1, post_frames_needed)
+                    while post_frames_count < target_frames:
+                        video_writer.write(annotated_frame)
+                        post_frames_count += 1
+                elif not pipeline.running:
+                    print("⚠️ Pipeline stopped, ending recording early")
+                    break
             
             video_writer.release()
             print(f"✅ Forensic video saved: {video_path}")
@@ -143,11 +338,40 @@ class RecorderService:
             with self.recording_lock:
                 self.is_recording = False
     
+    def _record_from_segments(self, video_path):
+        """
+        Cut the alert clip from continuous recording segments
+        
+        Waits out the post-event window (extended by further detections),
+        then cuts the covering segments into one file.
+        
+        Args:
+            video_path (str): Where to write the clip
+            
+        Returns:
+            str: Path to saved video file, or None if failed
+        """
+        event_time = time.time()
+        clip_start = event_time - self.pre_event_seconds
+        self.clip_end_time = event_time + self.post_event_seconds
+        
+        while time.time() < self.clip_end_time:
+            time.sleep(min(0.2, max(0.0, self.clip_end_time - time.time())))
+        
+        video_path = self.segment_recorder.build_clip(clip_start, self.clip_end_time, video_path)
+        if video_path:
+            print(f"✅ Forensic video saved: {video_path}")
+        return video_path
+    
     def get_buffer_status(self):
         """Get ring buffer status"""
         with self.buffer_lock:
+            buffer_length = self._buffer_length()
             return {
-                'buffer_size': len(self.frame_buffer),
-                'max_size': self.frame_buffer.maxlen,
-                'fill_percentage': (len(self.frame_buffer) / self.frame_buffer.maxlen) * 100
+                'buffer_size': buffer_length,
+                'max_size': self.buffer_size,
+                'fill_percentage': (buffer_length / self.buffer_size) * 100,
+                'mode': self.buffer_mode,
+                'memory_bytes': self.buffer_bytes,
+                'memory_mb': round(self.buffer_bytes / (1024 * 1024), 2)
             }
@@ -0,0 +1,309 @@
+"""
+Segment Recorder - Continuous (DVR) Recording
+Writes rolling fixed-length segments per camera and cuts alert clips from them
+"""
+
+import cv2
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+
+class Segment:
+    """A finished segment file on disk"""
+
+    def __init__(self, path, start_time, end_time):
+        """
+        Initialize segment
+
+        Args:
+            path (str): Segment file path
+            start_time (float): Wall-clock time of the first frame
+            end_time (float): Wall-clock time the segment was closed
+        """
+        self.path = path
+        self.start_time = start_time
+        self.end_time = end_time
+
+
+class SegmentRecorder:
+    """
+    Continuous recorder for a single camera
+
+    Annotated frames from the vision pipeline are streamed into short
+    segment files. Segments are written at a constant frame rate (frames are
+    repeated or dropped to match wall-clock time), so a position in a
+    segment maps directly to the time it was captured. Alert clips are the
+    covering segments joined with an ffmpeg stream copy (no re-encode) when
+    ffmpeg is available.
+    """
+
+    def __init__(self, pipeline, segment_folder, camera_id=0, segment_seconds=10,
+                 retention_seconds=3600, fps=8):
+        """
+        Initialize segment recorder
+
+        Args:
+            pipeline: Vision pipeline producing annotated frames for this camera
+            segment_folder (str): Root folder for segments (one subfolder per camera)
+            camera_id (int): Camera this recorder belongs to
+            segment_seconds (int): Length of each segment
+            retention_seconds (int): Delete segments older than this
+            fps (int): Constant frame rate of the segment files
+        """
+        self.pipeline = pipeline
+        self.camera_id = camera_id
+        self.segment_seconds = segment_seconds
+        self.retention_seconds = retention_seconds
+        self.fps = fps
+
+        self.folder = os.path.join(segment_folder, f"cam{camera_id}")
+        os.makedirs(self.folder, exist_ok=True)
+
+        # Finished segments, oldest first
+        self.segments = []
+        self.segments_lock = threading.Lock()
+        self.segment_closed = threading.Condition(self.segments_lock)
+
+        # Segment currently being written
+        self.writer = None
+        self.current_path = None
+        self.current_start = 0
+        self.current_frames = 0
+        self.rotate_requested = False
+
+        self.running = False
+        self.thread = None
+
+        self.ffmpeg_path = shutil.which('ffmpeg')
+        if self.ffmpeg_path is None:
+            print("⚠️ ffmpeg not found - alert clips will be re-encoded from segments")
+
+        self._load_existing_segments()
+
+    def _load_existing_segments(self):
+        """Register segments left on disk by a previous run (for retention)"""
+        for filename in sorted(os.listdir(self.folder)):
+            if not (filename.startswith('seg_') and filename.endswith('.mp4')):
+                continue
+            path = os.path.join(self.folder, filename)
+            try:
+                start_time = int(filename[4:-4]) / 1000
+            except ValueError:
+                continue
+            self.segments.append(Segment(path, start_time, os.path.getmtime(path)))
+
+        self._apply_retention()
+
+    def start(self):
+        """Start the segment writer thread"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"✅ Continuous recording started (camera: {self.camera_id}, "
+              f"{self.segment_seconds}s segments)")
+
+    def stop(self, timeout=2.0):
+        """Stop writing and close the current segment"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self._close_segment(time.time())
+
+    def _run(self):
+        """Writer loop: pipeline frame → current segment (rotating as needed)"""
+        sequence = self.pipeline.get_frame_sequence()
+
+        while self.running:
+            sequence, frame = self.pipeline.wait_for_frame(sequence)
+            if frame is None:
+                continue
+
+            try:
+                self._write_frame(frame, time.time())
+            except Exception as e:
+                print(f"❌ Segment write error (camera {self.camera_id}): {e}")
+                self._close_segment(time.time())
+                time.sleep(0.5)
+
+    def _write_frame(self, frame, now):
+        """Append a frame, repeating or dropping it to keep a constant frame rate"""
+        if (self.writer is None or self.rotate_requested or
+                now - self.current_start >= self.segment_seconds):
+            self._close_segment(now)
+            self._open_segment(frame, now)
+
+        target_frames = int((now - self.current_start) * self.fps) + 1
+        while self.current_frames < target_frames:
+            self.writer.write(frame)
+            self.current_frames += 1
+
+    def _open_segment(self, frame, now):
+        """Start a new segment file named after its start time"""
+        height, width = frame.shape[:2]
+        self.current_path = os.path.join(self.folder, f"seg_{int(now * 1000)}.mp4")
+        fourcc = cv2.VideoWriter_fourcc(*'x264')
+        self.writer = cv2.VideoWriter(self.current_path, fourcc, self.fps, (width, height))
+        self.current_start = now
+        self.current_frames = 0
+        self.rotate_requested = False
+
+    def _close_segment(self, now):
+        """Finish the current segment and publish it"""
+        if self.writer is None:
+            return
+
+        self.writer.release()
+        self.writer = None
+
+        with self.segment_closed:
+            self.segments.append(Segment(self.current_path, self.current_start, now))
+            self.segment_closed.notify_all()
+
+        self._apply_retention()
+
+    def _apply_retention(self):
+        """Delete segments older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+
+        with self.segments_lock:
+            expired = [s for s in self.segments if s.end_time < cutoff]
+            self.segments = [s for s in self.segments if s.end_time >= cutoff]
+
+        for segment in expired:
+            try:
+                os.remove(segment.path)
+            except OSError as e:
+                print(f"⚠️ Error deleting segment {segment.path}: {e}")
+
+    def wait_for_coverage(self, end_time, timeout=None):
+        """
+        Block until the segments on disk cover everything up to end_time
+
+        Args:
+            end_time (float): Wall-clock time that must be covered
+            timeout (float): Maximum seconds to wait (default: two segments)
+
+        Returns:
+            bool: True if covered
+        """
+        deadline = time.time() + (timeout or self.segment_seconds * 2 + 5)
+
+        with self.segment_closed:
+            while not self.segments or self.segments[-1].end_time < end_time:
+                if time.time() >= end_time:
+                    # Don't wait for a full segment - cut the current one now
+                    self.rotate_requested = True
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    return bool(self.segments) and self.segments[-1].end_time >= end_time
+                self.segment_closed.wait(min(remaining, 0.5))
+        return True
+
+    def build_clip(self, start_time, end_time, output_path):
+        """
+        Build a clip covering [start_time, end_time] from finished segments
+
+        Args:
+            start_time (float): Clip start (wall-clock time)
+            end_time (float): Clip end (wall-clock time)
+            output_path (str): Where to write the clip
+
+        Returns:
+            str: Path to the clip, or None if no footage covers the window
+        """
+        self.wait_for_coverage(end_time)
+
+        with self.segments_lock:
+            covering = [s for s in self.segments
+                        if s.end_time > start_time and s.start_time < end_time]
+
+        if not covering:
+            print(f"⚠️ No segments cover the alert window (camera {self.camera_id})")
+            return None
+
+        if self.ffmpeg_path is not None:
+            return self._ffmpeg_clip(covering, end_time - covering[0].start_time, output_path)
+
+        offset = max(0.0, start_time - covering[0].start_time)
+        duration = end_time - max(start_time, covering[0].start_time)
+        return self._reencode_clip(covering, offset, duration, output_path)
+
+    def _ffmpeg_clip(self, segments, duration, output_path):
+        """
+        Join segments with an ffmpeg stream copy (no re-encode)
+
+        OpenCV's writer does not expose the GOP length, so the only known
+        keyframe is the first frame of each segment: the clip starts at the
+        first covering segment (up to one segment before the pre-event
+        window) and is cut only at its end, where any frame will do.
+        """
+        list_file = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+        try:
+            for segment in segments:
+                safe_path = segment.path.replace("'", "'\\''")
+                list_file.write(f"file '{safe_path}'\n")
+            list_file.close()
+
+            subprocess.run(
+                [self.ffmpeg_path, '-y', '-loglevel', 'error',
+                 '-f', 'concat', '-safe', '0', '-i', list_file.name,
+                 '-t', f"{duration:.3f}", '-c', 'copy', '-movflags', '+faststart', output_path],
+                check=True, timeout=60
+            )
+            return output_path
+        except Exception as e:
+            print(f"❌ Error cutting alert clip: {e}")
+            return None
+        finally:
+            os.unlink(list_file.name)
+
+    def _reencode_clip(self, segments, offset, duration, output_path):
+        """Fallback: copy the clip window frame by frame with OpenCV"""
+        first_frame = int(offset * self.fps)
+        last_frame = first_frame + int(duration * self.fps)
+        video_writer = None
+        frame_index = 0
+
+        try:
+            for segment in segments:
+                capture = cv2.VideoCapture(segment.path)
+                while frame_index < last_frame:
+                    success, frame = capture.read()
+                    if not success:
+                        break
+                    if frame_index >= first_frame:
+                        if video_writer is None:
+                            height, width = frame.shape[:2]
+                            fourcc = cv2.VideoWriter_fourcc(*'x264')
+                            video_writer = cv2.VideoWriter(output_path, fourcc, self.fps, (width, height))
+                            if not video_writer.isOpened():
+                                print(f"❌ Could not open video writer for {output_path}")
+                                capture.release()
+                                return None
+                        video_writer.write(frame)
+                    frame_index += 1
+                capture.release()
+
+            return output_path if video_writer is not None else None
+        finally:
+            if video_writer is not None:
+                video_writer.release()
+
+    def get_status(self):
+        """Get segment recorder status"""
+        with self.segments_lock:
+            return {
+                'running': self.running,
+                'segments': len(self.segments),
+                'oldest_segment': self.segments[0].start_time if self.segments else None,
+                'current_segment': self.current_path,
+                'ffmpeg': self.ffmpeg_path is not None
+            }
@@ -11,39 +11,46 @@ from datetime import datetime
 class TelegramService:
     """Manages Telegram bot communication"""
     
-    def __init__(self, bot_token, chat_id):
+    def __init__(self, bot_token, chat_id, jpeg_encoder=None):
         """
         Initialize Telegram service
         
         Args:
             bot_token (str): Telegram bot token
             chat_id (str): Telegram chat ID
+            jpeg_encoder (JpegEncoder): Shared JPEG encoder (OpenCV if None)
         """
         self.bot_token = bot_token
         self.chat_id = chat_id
+        self.jpeg_encoder = jpeg_encoder
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
     
-    def send_photo_alert(self, frame, threat_type):
+    def send_photo_alert(self, frame, threat_type, camera_name=None):
         """
         Send photo alert to Telegram
         
         Args:
             frame: Image frame (numpy array)
             threat_type (str): Type of threat detected
+            camera_name (str): Camera that detected the threat
             
         Returns:
             bool: True if sent successfully
         """
         try:
-            # Encode frame as JPEG
-            _, img_encoded = cv2.imencode('.jpg', frame)
+            # Encode frame as JPEG (full chroma - evidence snapshot)
+            if self.jpeg_encoder is not None:
+                photo_bytes = self.jpeg_encoder.encode_preset(frame, 'archive')
+            else:
+                _, img_encoded = cv2.imencode('.jpg', frame)
+                photo_bytes = img_encoded.tobytes()
             
             # Prepare API request
             url = f"{self.base_url}/sendPhoto"
-            files = {'photo': ('threat.jpg', img_encoded.tobytes(), 'image/jpeg')}
+            files = {'photo': ('threat.jpg', photo_bytes, 'image/jpeg')}
             data = {
                 'chat_id': self.chat_id,
-                'caption': self._create_caption(threat_type)
+                'caption': self._create_caption(threat_type, camera_name)
             }
             
             # Send request
@@ -60,18 +67,22 @@ class TelegramService:
             print(f"❌ Error sending Telegram photo: {e}")
             return False
     
-    def _create_caption(self, threat_type):
+    def _create_caption(self, threat_type, camera_name=None):
         """
         Create caption for Telegram message
         
         Args:
             threat_type (str): Type of threat
+            camera_name (str): Camera that detected the threat
             
         Returns:
             str: Formatted caption
         """
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return (f"🚨 THREAT DETECTED: {threat_type}\n"
+        caption = f"🚨 THREAT DETECTED: {threat_type}\n"
+        if camera_name:
+            caption += f"📷 Camera: {camera_name}\n"
+        return (caption +
                 f"🕐 Time: {timestamp}\n"
                 f"📹 Forensic video saved locally")
     
@@ -3,60 +3,230 @@ Threat Logic Service
 Analyzes detections and determines threat conditions
 """
 
+from collections import deque
+
+import numpy as np
+
+from app.services.detections import Detections
+
+
+class ThreatRule:
+    """
+    A threat rule compiled against the model's class IDs
+    
+    The required classes become a single bitmask, so a rule matches when
+    (present_classes & mask) == mask.
+    """
+    
+    def __init__(self, name, class_ids, min_confidence=0.0, max_distance=None,
+                 severity='High', message=None, telegram=True):
+        """
+        Initialize rule
+        
+        Args:
+            name (str): Threat type reported when the rule matches
+            class_ids (list): Class IDs that must all be present
+            min_confidence (float): Ignore detections scored below this
+            max_distance (float): Max pixel distance between the box centres of
+                                  the first class and each other class (None = anywhere)
+            severity (str): Severity stored with alerts (Critical, High, Medium, Low)
+            message (str): Human-readable alert message
+            telegram (bool): Send Telegram alerts for this threat
+        """
+        self.name = name
+        self.class_ids = class_ids
+        self.mask = 0
+        for class_id in class_ids:
+            self.mask |= 1 << class_id
+        self.min_confidence = min_confidence
+        self.max_distance = max_distance
+        self.severity = severity
+        self.message = message or f"Tehdit tespit edildi: {name}"
+        self.telegram = telegram
+
 
 class ThreatLogic:
     """
     Implements threat detection logic
     Determines if detected objects constitute a security threat
     
-    COMBINATION-BASED DETECTION:
-    - Requires PERSON + threat object to trigger alert
-    - Prevents false alarms from unmanned weapons/items
+    Rules are declared by class name (config THREAT_RULES, or DEFAULT_RULES
+    when that is None) and compiled once into class-ID bitmasks. Each
+    frame's detections are reduced to one bitmask per confidence threshold,
+    and rules are checked in order; the first match wins.
+    
+    COMBINATION-BASED DETECTION (default rules):
+    - Kar Maskesi (masked face) → DANGER (immediate threat)
+    - Insan + Silah → DANGER (armed person)
+    - Insan + Bicak → DANGER (person with weapon)
+    - Silah/Bicak alone → NORMAL (no threat without person)
     """
     
+    DEFAULT_RULES = [
+        {
+            'name': 'Maskeli Kisi Tespit Edildi',
+            'classes': ['Kar Maskesi'],
+            'severity': 'Critical',
+            'message': 'KRITIK: Maskeli kisi tespit edildi!'
+        },
+        {
+            'name': 'Silahli Kisi Tespit Edildi',
+            'classes': ['Insan', 'Silah'],
+            'severity': 'Critical',
+            'message': 'KRITIK: Silahli kisi tespit edildi!'
+        },
+        {
+            'name': 'Bicakli Kisi Tespit Edildi',
+            'classes': ['Insan', 'Bicak'],
+            'severity': 'High',
+            'message': 'YUKSEK ALARM: Bicakli kisi tespit edildi!'
+        }
+    ]
+    
+    # Classes that keep the scene "active" even when no rule uses them
+    ACTIVITY_CLASSES = ['Insan']
+    
+    def __init__(self, class_names, rules=None, camera_id=None):
+        """
+        Compile threat rules for one camera
+        
+        Args:
+            class_names (dict): Class ID → display name (from the model)
+            rules (list): Rule definitions (default: DEFAULT_RULES). Each is a dict
+                          with 'name', 'classes' and optional 'min_confidence',
+                          'max_distance', 'severity', 'message', 'telegram' and
+                          'cameras' (camera IDs the rule applies to)
+            camera_id (int): Camera these rules are compiled for
+        """
+        self.class_names = class_names
+        self.rules = []
+        self.rules_by_name = {}
+        
+        class_ids = {name: class_id for class_id, name in class_names.items()}
+        
+        for definition in (self.DEFAULT_RULES if rules is None else rules):
+            cameras = definition.get('cameras')
+            if cameras is not None and camera_id not in cameras:
+                continue
+            
+            missing = [name for name in definition['classes'] if name not in class_ids]
+            if missing:
+                print(f"⚠️ Threat rule '{definition['name']}' skipped, unknown classes: {missing}")
+                continue
+            
+            rule = ThreatRule(
+                definition['name'],
+                [class_ids[name] for name in definition['classes']],
+                min_confidence=definition.get('min_confidence', 0.0),
+                max_distance=definition.get('max_distance'),
+                severity=definition.get('severity', 'High'),
+                message=definition.get('message'),
+                telegram=definition.get('telegram', True)
+            )
+            self.rules.append(rule)
+            self.rules_by_name[rule.name] = rule
+        
+        # Distinct confidence thresholds: one presence bitmask each per frame
+        self.thresholds = sorted({rule.min_confidence for rule in self.rules})
+        
+        self.activity_mask = 0
+        for rule in self.rules:
+            self.activity_mask |= rule.mask
+        for name in self.ACTIVITY_CLASSES:
+            if name in class_ids:
+                self.activity_mask |= 1 << class_ids[name]
+    
     @staticmethod
-    def check_threat_conditions(detections):
+    def _presence_mask(class_ids):
+        """Bitmask of the distinct class IDs in an array"""
+        mask = 0
+        for class_id in np.unique(class_ids).tolist():
+            mask |= 1 << class_id
+        return mask
+    
+    def check_threat_conditions(self, detections):
         """
         Analyze detections and identify threats
         
-        UPDATED LOGIC (Turkish class names):
-        - Kar Maskesi (masked face) → DANGER (immediate threat)
-        - İnsan + Silah → DANGER (armed person)
-        - İnsan + Bıçak → DANGER (person with weapon)
-        - İnsan alone → NORMAL
-        - Silah/Bıçak alone → NORMAL (no threat without person)
-        
         Args:
-            detections (list): List of detection dictionaries
-                              Each dict contains: {'class': str, 'confidence': float}
+            detections (Detections): Frame detections
         
         Returns:
             tuple: (is_threat: bool, threat_type: str or None)
         """
-        # Extract detected class names
-        detected_classes = [det['class'] for det in detections]
-        
-        # Priority 1: Kar Maskesi (masked face) - ALWAYS A THREAT
-        # Masked individuals are suspicious regardless of other detections
-        if 'Kar Maskesi' in detected_classes:
-            return True, "Maskeli Kisi Tespit Edildi"
-        
-        # Check if person is present for weapon threats
-        has_person = 'Insan' in detected_classes
+        if not self.rules or len(detections) == 0:
+            return False, None
         
-        # Priority 2: Insan + Silah (armed individual)
-        if has_person and 'Silah' in detected_classes:
-            return True, "Silahli Kisi Tespit Edildi"
+        present = {
+            threshold: self._presence_mask(detections.class_id[detections.confidence >= threshold])
+            for threshold in self.thresholds
+        }
         
-        # Priority 3: Insan + Bicak (person with weapon)
-        if has_person and 'Bicak' in detected_classes:
-            return True, "Bicakli Kisi Tespit Edildi"
+        for rule in self.rules:
+            if present[rule.min_confidence] & rule.mask != rule.mask:
+                continue
+            if rule.max_distance is not None and not self._within_distance(detections, rule):
+                continue
+            return True, rule.name
         
         # No threat conditions met
         return False, None
     
     @staticmethod
-    def get_threat_severity(threat_type):
+    def _within_distance(detections, rule):
+        """Check that every other rule class has a box near one of the first class"""
+        confident = detections.confidence >= rule.min_confidence
+        centres = (detections.xyxy[:, :2] + detections.xyxy[:, 2:]) / 2
+        anchors = centres[confident & (detections.class_id == rule.class_ids[0])]
+        
+        for class_id in rule.class_ids[1:]:
+            others = centres[confident & (detections.class_id == class_id)]
+            distances = np.linalg.norm(anchors[:, None, :] - others[None, :, :], axis=2)
+            if distances.min() > rule.max_distance:
+                return False
+        
+        return True
+    
+    def is_scene_active(self, detections):
+        """
+        Check whether a frame shows activity worth watching closely
+        
+        A person or any class used by a threat rule speeds up detection.
+        
+        Args:
+            detections (Detections): Frame detections
+            
+        Returns:
+            bool: True if the scene is active
+        """
+        return bool(self._presence_mask(detections.class_id) & self.activity_mask)
+    
+    def get_threat_detection(self, detections, threat_type):
+        """
+        Find the detection that triggered a threat (for logging)
+
+        The last class of a rule is the distinguishing object (weapon, mask),
+        so its most confident detection is reported.
+
+        Args:
+            detections (Detections): Frame detections
+            threat_type (str): Threat type returned by check_threat_conditions
+
+        Returns:
+            tuple: (class_name: str or None, confidence: float or None)
+        """
+        rule = self.rules_by_name.get(threat_type)
+        if rule is None or detections is None:
+            return None, None
+
+        class_id = rule.class_ids[-1]
+        scores = detections.confidence[detections.class_id == class_id]
+        if len(scores) == 0:
+            return self.class_names.get(class_id), None
+
+        return self.class_names.get(class_id), float(scores.max())
+
+    def get_threat_severity(self, threat_type):
         """
         Get severity level for a threat type
         
@@ -66,17 +236,10 @@ class ThreatLogic:
         Returns:
             str: Severity level (Critical, High, Medium, Low)
         """
-        # ALL THREATS ARE HIGH SEVERITY
-        severity_map = {
-            "Maskeli Kisi Tespit Edildi": "Yuksek",
-            "Silahli Kisi Tespit Edildi": "Yuksek",
-            "Bicakli Kisi Tespit Edildi": "Yuksek"
-        }
-        
-        return severity_map.get(threat_type, "Yuksek")
+        rule = self.rules_by_name.get(threat_type)
+        return rule.severity if rule else "High"
     
-    @staticmethod
-    def should_send_telegram_alert(threat_type):
+    def should_send_telegram_alert(self, threat_type):
         """
         Determine if Telegram alert should be sent for this threat
         
@@ -86,16 +249,10 @@ class ThreatLogic:
         Returns:
             bool: True if alert should be sent
         """
-        # Send alerts for all person + threat combinations
-        high_priority = [
-            "Maskeli Kisi Tespit Edildi",
-            "Silahli Kisi Tespit Edildi",
-            "Bicakli Kisi Tespit Edildi"
-        ]
-        return threat_type in high_priority
+        rule = self.rules_by_name.get(threat_type)
+        return rule.telegram if rule else True
     
-    @staticmethod
-    def get_threat_message(threat_type):
+    def get_threat_message(self, threat_type):
         """
         Generate human-readable threat message
         
@@ -105,13 +262,8 @@ class ThreatLogic:
         Returns:
             str: Formatted threat message
         """
-        messages = {
-            "Maskeli Kisi Tespit Edildi": "KRITIK: Maskeli kisi tespit edildi!",
-            "Silahli Kisi Tespit Edildi": "KRITIK: Silahli kisi tespit edildi!",
-            "Bicakli Kisi Tespit Edildi": "YUKSEK ALARM: Bicakli kisi tespit edildi!"
-        }
-        
-        return messages.get(threat_type, f"Tehdit tespit edildi: {threat_type}")
+        rule = self.rules_by_name.get(threat_type)
+        return rule.message if rule else f"Tehdit tespit edildi: {threat_type}"
     
     @staticmethod
     def get_detection_summary(detections):
@@ -119,16 +271,59 @@ class ThreatLogic:
         Get a summary of what's currently detected (for logging)
         
         Args:
-            detections (list): List of detection dictionaries
+            detections (Detections or list): Frame detections
             
         Returns:
             str: Summary string
         """
-        detected_classes = [det['class'] for det in detections]
-        class_counts = {}
-        
-        for cls in detected_classes:
-            class_counts[cls] = class_counts.get(cls, 0) + 1
+        if isinstance(detections, Detections):
+            class_counts = detections.count_by_class()
+        else:
+            class_counts = {}
+            for det in detections:
+                class_counts[det['class']] = class_counts.get(det['class'], 0) + 1
         
         summary_parts = [f"{count}x {cls}" for cls, count in class_counts.items()]
         return ", ".join(summary_parts) if summary_parts else "No detections"
+
+
+class ThreatPersistence:
+    """
+    Confirms a threat only once it persists across detection frames
+    
+    A threat type must be seen in at least `required` of the last `window`
+    detection frames, so a single misdetection cannot trigger a recording
+    and Telegram alert. required=1, window=1 reacts to every frame.
+    """
+    
+    def __init__(self, required=3, window=5):
+        """
+        Initialize persistence filter
+        
+        Args:
+            required (int): Frames (K) that must show the threat
+            window (int): Most recent detection frames (M) considered
+        """
+        self.required = required
+        self.history = deque(maxlen=max(window, required))
+    
+    def update(self, threat_type):
+        """
+        Record one detection frame's result
+        
+        Args:
+            threat_type (str): Threat seen in this frame, or None
+            
+        Returns:
+            tuple: (is_threat: bool, threat_type: str or None)
+        """
+        self.history.append(threat_type)
+        
+        if threat_type is not None and self.history.count(threat_type) >= self.required:
+            return True, threat_type
+        
+        return False, None
+    
+    def reset(self):
+        """Forget all recorded frames"""
+        self.history.clear()
@@ -0,0 +1,203 @@
+"""
+Tracker Service - Lightweight Multi-Object Tracker
+Links detections across frames by IoU and predicts boxes between detections
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from app.services.detections import Detections, box_iou
+
+
+class Track:
+    """A tracked object with a constant-velocity box estimate"""
+
+    def __init__(self, track_id, box, class_id, confidence, timestamp):
+        """
+        Initialize track from its first detection
+
+        Args:
+            track_id (int): Unique track ID
+            box: xyxy box
+            class_id (int): Detected class ID
+            confidence (float): Detection score
+            timestamp (float): Capture time of the detection
+        """
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.class_id = class_id
+        self.confidence = confidence
+        self.last_update = timestamp
+        self.hits = 1
+
+    def predict(self, timestamp, max_extrapolation):
+        """Box estimate at a given time (extrapolation is capped)"""
+        dt = min(max(timestamp - self.last_update, 0.0), max_extrapolation)
+        return self.box + self.velocity * dt
+
+    def update(self, box, confidence, timestamp, position_gain, velocity_gain):
+        """
+        Correct the estimate with a matched detection (alpha-beta filter)
+
+        Args:
+            box: Measured xyxy box
+            confidence (float): Detection score
+            timestamp (float): Capture time of the detection
+            position_gain (float): Weight of the measurement in the box estimate
+            velocity_gain (float): Weight of the residual in the velocity estimate
+        """
+        dt = timestamp - self.last_update
+        predicted = self.box + self.velocity * dt
+        residual = np.asarray(box, dtype=np.float32) - predicted
+
+        self.box = predicted + position_gain * residual
+        if dt > 0:
+            self.velocity = self.velocity + velocity_gain * residual / dt
+
+        self.confidence = confidence
+        self.last_update = timestamp
+        self.hits += 1
+
+
+class ObjectTracker:
+    """
+    IoU tracker for one camera
+
+    Detections are matched to existing tracks of the same class by the IoU
+    of their predicted boxes. Unmatched detections start new tracks, and
+    tracks not seen for max_age seconds are dropped. Between detections,
+    predict() gives every live track's box at display time, so overlays
+    keep up with moving objects even at a low detection rate.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=1.0, position_gain=0.7, velocity_gain=0.3):
+        """
+        Initialize tracker
+
+        Args:
+            iou_threshold (float): Minimum IoU to match a detection to a track
+            max_age (float): Seconds a track survives without a matching detection
+            position_gain (float): Measurement weight for box positions (0-1)
+            velocity_gain (float): Measurement weight for box velocities (0-1)
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.position_gain = position_gain
+        self.velocity_gain = velocity_gain
+
+        self.lock = threading.Lock()
+        self.tracks = []
+        self.next_track_id = 1
+        self.class_names = {}
+
+        # Statistics
+        self.tracks_started = 0
+
+    def update(self, detections, timestamp=None):
+        """
+        Feed one frame's detections into the tracker
+
+        Args:
+            detections (Detections): Detections for the frame
+            timestamp (float): Capture time of the frame (default: time.time())
+
+        Returns:
+            Detections: This frame's detections with their track IDs
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self.lock:
+            self.class_names = detections.class_names
+            track_ids = np.zeros(len(detections), dtype=np.int32)
+            matched = self._match(detections, timestamp)
+
+            for det_index in range(len(detections)):
+                box = detections.xyxy[det_index]
+                confidence = float(detections.confidence[det_index])
+                track = matched.get(det_index)
+
+                if track is None:
+                    track = Track(self.next_track_id, box, int(detections.class_id[det_index]),
+                                  confidence, timestamp)
+                    self.tracks.append(track)
+                    self.next_track_id += 1
+                    self.tracks_started += 1
+                else:
+                    track.update(box, confidence, timestamp, self.position_gain, self.velocity_gain)
+
+                track_ids[det_index] = track.track_id
+
+            # Drop tracks that have not been seen for too long
+            self.tracks = [t for t in self.tracks if timestamp - t.last_update <= self.max_age]
+
+        return Detections(detections.xyxy, detections.confidence, detections.class_id,
+                          detections.class_names, track_ids)
+
+    def _match(self, detections, timestamp):
+        """
+        Greedily pair detections with tracks of the same class, best IoU first
+
+        Returns:
+            dict: Detection index → matched Track
+        """
+        if not self.tracks or len(detections) == 0:
+            return {}
+
+        predicted = np.array([t.predict(timestamp, self.max_age) for t in self.tracks])
+        track_classes = np.array([t.class_id for t in self.tracks])
+
+        iou = box_iou(predicted, detections.xyxy)
+        iou[track_classes[:, None] != detections.class_id[None, :]] = 0
+
+        matched = {}
+        used_tracks = set()
+        for flat_index in np.argsort(iou, axis=None)[::-1]:
+            track_index, det_index = np.unravel_index(flat_index, iou.shape)
+            if iou[track_index, det_index] < self.iou_threshold:
+                break
+            if track_index in used_tracks or det_index in matched:
+                continue
+            used_tracks.add(track_index)
+            matched[int(det_index)] = self.tracks[track_index]
+
+        return matched
+
+    def predict(self, timestamp=None):
+        """
+        Estimate every live track's box at a given time
+
+        Args:
+            timestamp (float): Display time (default: time.time())
+
+        Returns:
+            Detections: Predicted boxes with track IDs
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self.lock:
+            live = [t for t in self.tracks if timestamp - t.last_update <= self.max_age]
+            if not live:
+                return Detections.empty(self.class_names)
+
+            return Detections(
+                [t.predict(timestamp, self.max_age) for t in live],
+                [t.confidence for t in live],
+                [t.class_id for t in live],
+                self.class_names,
+                [t.track_id for t in live]
+            )
+
+    def get_status(self):
+        """Get tracker statistics"""
+        with self.lock:
+            return {
+                'active_tracks': len(self.tracks),
+                'tracks_started': self.tracks_started,
+                'iou_threshold': self.iou_threshold,
+                'max_age': self.max_age
+            }
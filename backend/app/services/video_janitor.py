@@ -0,0 +1,151 @@
+"""
+Video Janitor - Background Video Removal
+Deletes alert videos off the request thread and reports progress
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+
+class CleanupJob:
+    """A batch of video files to delete"""
+
+    def __init__(self, job_id, video_paths):
+        """
+        Initialize job
+
+        Args:
+            job_id (int): Job ID
+            video_paths (list): Video paths as stored with the alerts
+        """
+        self.job_id = job_id
+        self.video_paths = video_paths
+        self.deleted = 0
+        self.missing = 0
+        self.failed = 0
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self):
+        """Check if every file has been handled"""
+        return self.finished_at is not None
+
+    def to_dict(self):
+        """Convert to dictionary (progress report)"""
+        total = len(self.video_paths)
+        processed = self.deleted + self.missing + self.failed
+        return {
+            'id': self.job_id,
+            'total': total,
+            'processed': processed,
+            'deleted': self.deleted,
+            'missing': self.missing,
+            'failed': self.failed,
+            'progress': round(processed / total, 3) if total else 1.0,
+            'done': self.done
+        }
+
+
+class VideoJanitor:
+    """
+    Removes alert videos in a background thread
+
+    Deleting alerts only touches the database; their video files are handed
+    here, so clearing a large archive returns immediately and the files are
+    unlinked one job at a time. Recent jobs are kept for progress queries.
+    """
+
+    def __init__(self, video_folder, max_jobs=20):
+        """
+        Initialize janitor
+
+        Args:
+            video_folder (str): Folder that holds the alert videos
+            max_jobs (int): Finished jobs kept for progress queries
+        """
+        self.video_folder = video_folder
+        self.max_jobs = max_jobs
+
+        self.queue = queue.Queue()
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.next_job_id = 1
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, video_paths):
+        """
+        Queue video files for deletion
+
+        Args:
+            video_paths (list): Video paths as stored with the alerts
+
+        Returns:
+            dict: Progress report of the new job
+        """
+        with self.lock:
+            job = CleanupJob(self.next_job_id, list(video_paths))
+            self.next_job_id += 1
+            self.jobs[job.job_id] = job
+
+            # Forget the oldest finished jobs
+            while len(self.jobs) > self.max_jobs:
+                oldest = next(iter(self.jobs.values()))
+                if not oldest.done:
+                    break
+                self.jobs.popitem(last=False)
+
+        self.queue.put(job)
+        return job.to_dict()
+
+    def _resolve(self, video_path):
+        """Map a stored video path to the file in the alert folder"""
+        return os.path.join(self.video_folder, video_path.split('/')[-1])
+
+    def _run(self):
+        """Janitor thread: delete queued files"""
+        while True:
+            job = self.queue.get()
+
+            for video_path in job.video_paths:
+                path = self._resolve(video_path)
+                try:
+                    os.remove(path)
+                    job.deleted += 1
+                except FileNotFoundError:
+                    job.missing += 1
+                except OSError as e:
+                    job.failed += 1
+                    print(f"⚠️ Error deleting video file {path}: {e}")
+
+            job.finished_at = time.time()
+            if job.video_paths:
+                print(f"🗑️ Cleanup job {job.job_id}: deleted {job.deleted} of {len(job.video_paths)} videos")
+
+    def get_job(self, job_id):
+        """
+        Get the progress of a job
+
+        Args:
+            job_id (int): Job ID
+
+        Returns:
+            dict: Progress report, or None if the job is unknown
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def get_status(self):
+        """Get progress of the recent jobs"""
+        with self.lock:
+            jobs = [job.to_dict() for job in self.jobs.values()]
+        return {
+            'pending_jobs': sum(not job['done'] for job in jobs),
+            'jobs': jobs
+        }
@@ -3,28 +3,51 @@ YOLO Service - Model Management
 Handles YOLOv8 model loading and inference
 """
 
+import threading
+
 from ultralytics import YOLO
 
+from app.services.detections import Detections
+from app.services.annotation_service import FrameAnnotator
+from app.services.model_export import ModelExporter
+
 
 class YOLOService:
     """Manages YOLO model lifecycle and inference"""
     
-    def __init__(self, model_path):
+    def __init__(self, model_path, backend='pytorch', int8=False, inference_size=480,
+                 validate=False, validation_images=None, min_agreement=0.9, calibration_data=None):
         """
         Initialize YOLO model
         
         Args:
             model_path (str): Path to YOLO model file (.pt)
+            backend (str): Inference runtime: 'pytorch', 'onnx' or 'openvino'
+            int8 (bool): Use an INT8-quantized export
+            inference_size (int): Image size for inference (and exported models)
+            validate (bool): Compare the exported model against PyTorch at startup
+            validation_images (str): Folder of sample frames for validation
+            min_agreement (float): Fall back to PyTorch below this detection agreement
+            calibration_data (str): Dataset YAML for OpenVINO INT8 calibration
         """
         self.model_path = model_path
         self.model = None
         self.class_names = {}
+        self.inference_size = inference_size
+        self.exporter = ModelExporter(model_path, backend, int8, inference_size, calibration_data)
+        self.backend = backend
+        self.validate = validate
+        self.validation_images = validation_images
+        self.min_agreement = min_agreement
+        self.validation = None
+        # Model is shared by every camera pipeline; predictor is not thread-safe
+        self.inference_lock = threading.Lock()
         self.load_model()
     
     def load_model(self):
         """Load YOLO model from file"""
         try:
-            self.model = YOLO(self.model_path)
+            self.model = self._load_backend_model()
             
             # Turkish translations for class names (ASCII-safe)
             self.turkish_names = {
@@ -43,20 +66,70 @@ class YOLOService:
                 # Use Turkish name if available, otherwise keep original
                 self.class_names[idx] = self.turkish_names.get(name, name)
             
-            print(f"✅ Model loaded successfully from {self.model_path}")
+            # Drawing assets (colours, label metrics) are built once per class
+            self.annotator = FrameAnnotator(self.class_names)
+            
+            print(f"✅ Model loaded successfully from {self.model_path} ({self.backend})")
             print(f"📋 Detected classes: {self.class_names}")
             return True
         except Exception as e:
             print(f"❌ Failed to load model: {e}")
             raise
     
-    def run_inference(self, frame, inference_size=480, conf_threshold=0.15, verbose=False):
+    def _load_backend_model(self):
+        """
+        Load the model through the configured runtime
+        
+        Falls back to PyTorch if the export fails, or if validation shows the
+        exported model disagrees with PyTorch or is not faster than it.
+        """
+        if self.backend == 'pytorch':
+            return YOLO(self.model_path)
+        
+        try:
+            model = YOLO(self.exporter.export(), task='detect')
+        except Exception as e:
+            print(f"⚠️ {self.backend} export failed, using PyTorch: {e}")
+            self.backend = 'pytorch'
+            return YOLO(self.model_path)
+        
+        if not self.validate:
+            return model
+        
+        images = ModelExporter.get_validation_images(self.validation_images)
+        if not images:
+            print(f"⚠️ {self.backend} model NOT validated: set MODEL_VALIDATION_IMAGES to a folder "
+                  f"of frames from your cameras")
+            return model
+        
+        reference = YOLO(self.model_path)
+        self.validation = self.exporter.validate(reference, model, reference.names, images)
+        print(f"📊 {self.backend} validation: {self.validation}")
+        
+        if self.validation['agreement'] is None:
+            print(f"⚠️ {self.backend} agreement NOT checked: neither model detects anything in the validation images")
+        elif self.validation['agreement'] < self.min_agreement:
+            print(f"⚠️ {self.backend} model agrees on {self.validation['agreement']:.0%} of detections "
+                  f"(< {self.min_agreement:.0%}), using PyTorch")
+            self.backend = 'pytorch'
+            return reference
+        
+        if self.validation['candidate_latency_ms'] >= self.validation['reference_latency_ms']:
+            print(f"⚠️ {self.backend} model is not faster than PyTorch "
+                  f"({self.validation['candidate_latency_ms']} ms vs "
+                  f"{self.validation['reference_latency_ms']} ms), using PyTorch")
+            self.backend = 'pytorch'
+            return reference
+        
+        return model
+    
+    def run_inference(self, frame, inference_size=None, conf_threshold=0.15, verbose=False):
         """
         Run YOLO inference on a frame
         
         Args:
             frame: Input image frame (numpy array)
-            inference_size (int): Size for inference (default: 480)
+            inference_size (int): Size for inference (default: the configured size)
             conf_threshold (float): Confidence threshold (default: 0.15)
             verbose (bool): Print inference details
             
@@ -66,111 +139,73 @@ class YOLOService:
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        results = self.model(frame, imgsz=inference_size, conf=conf_threshold, verbose=verbose)
+        with self.inference_lock:
+            results = self.model(frame, imgsz=inference_size or self.inference_size, conf=conf_threshold, verbose=verbose)
         return results
     
+    def run_batch(self, frames, inference_size=None, conf_threshold=0.15, verbose=False):
+        """
+        Run YOLO inference on several frames in one batched forward pass
+        
+        Args:
+            frames (list): Input image frames (numpy arrays)
+            inference_size (int): Size for inference (default: the configured size)
+            conf_threshold (float): Confidence threshold (default: 0.15)
+            verbose (bool): Print inference details
+            
+        Returns:
+            list: One YOLO Results list per input frame, in input order
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded")
+        
+        if not frames:
+            return []
+        
+        with self.inference_lock:
+            results = self.model(list(frames), imgsz=inference_size or self.inference_size, conf=conf_threshold, verbose=verbose)
+        
+        # Wrap each result so it works with get_detections/annotate_frame
+        return [[result] for result in results]
+    
     def get_detections(self, results):
         """
         Extract detections from YOLO results
         
         Args:
-            results: YOLO Results object
+            results: YOLO Results object (or Detections from an inference pool)
             
         Returns:
-            list: List of detection dictionaries
+            Detections: Boxes, confidences and class IDs as NumPy arrays
+                        (iterates as detection dictionaries)
         """
-        detections = []
-        
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                cls_id = int(box.cls[0])
-                class_name = self.class_names[cls_id]
-                confidence = float(box.conf[0])
-                
-                detections.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'class_id': cls_id
-                })
-        
-        return detections
+        if isinstance(results, Detections):
+            return results
+        return Detections.from_results(results, self.class_names)
     
-    def annotate_frame(self, results):
+    def annotate_frame(self, results, detections=None):
         """
         Draw bounding boxes on frame with Turkish class names
         
         Args:
             results: YOLO Results object
+            detections (Detections): Already extracted detections (avoids re-reading boxes)
             
         Returns:
-            numpy array: Annotated frame
+            numpy array: Annotated copy of the frame
         """
-        import cv2
-        
-        # Get the original frame
-        frame = results[0].orig_img.copy()
-        
-        # Draw bounding boxes with Turkish names
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                cls_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-                
-                # Get Turkish class name
-                turkish_name = self.class_names.get(cls_id, f"Class {cls_id}")
-                
-                # Define colors based on class
-                colors = {
-                    'Kar Maskesi': (0, 0, 255),     # Red
-                    'Silah': (0, 0, 255),           # Red
-                    'Bicak': (0, 0, 255),           # Red
-                    'Para': (0, 255, 255),          # Yellow
-                    'Insan': (0, 255, 0),           # Green
-                    'Telefon': (255, 255, 0)        # Cyan
-                }
-                color = colors.get(turkish_name, (255, 0, 0))
-                
-                # Draw rectangle
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                
-                # Create label with Turkish name and confidence
-                label = f"{turkish_name} {confidence:.2f}"
-                
-                # Get text size for background rectangle
-                (text_width, text_height), baseline = cv2.getTextSize(
-                    label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2
-                )
-                
-                # Draw background rectangle for text
-                cv2.rectangle(
-                    frame, 
-                    (x1, y1 - text_height - 10), 
-                    (x1 + text_width + 5, y1), 
-                    color, 
-                    -1
-                )
-                
-                # Draw text
-                cv2.putText(
-                    frame, 
-                    label, 
-                    (x1 + 2, y1 - 5), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 
-                    0.6, 
-                    (255, 255, 255), 
-                    2
-                )
-        
-        return frame
+        if detections is None:
+            detections = self.get_detections(results)
+        
+        return self.annotator.render(results[0].orig_img.copy(), detections)
     
     def get_model_info(self):
         """Get model information"""
         return {
             'model_path': self.model_path,
+            'backend': self.backend,
+            'int8': self.exporter.int8,
+            'validation': self.validation,
             'classes': self.class_names,
             'num_classes': len(self.class_names)
         }
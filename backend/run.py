@@ -4,10 +4,25 @@ Main application runner
 """
 
 from app import create_app
+import argparse
 import sys
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='AGKS server')
+    parser.add_argument(
+        '--server',
+        choices=('threaded', 'asgi'),
+        default='threaded',
+        help="'threaded': Flask server, one thread per request and per MJPEG viewer; "
+             "'asgi': uvicorn event loop, MJPEG viewers share one relay thread per stream"
+    )
+    return parser.parse_args()
+
 def main():
     """Initialize and run the Flask application"""
+    args = parse_args()
+    
     try:
         # Create Flask app using factory pattern
         app = create_app()
@@ -16,10 +31,17 @@ def main():
         print("\n" + "=" * 50)
         print("🛡️  AGKS - Akıllı Gözetim Koruma Sistemi")
         print("=" * 50)
-        print("📡 Server starting...")
+        print(f"📡 Server starting ({args.server})...")
         print("📡 Access dashboard at: http://localhost:5000")
         print("=" * 50 + "\n")
         
+        if args.server == 'asgi':
+            import uvicorn
+            from app.asgi import create_asgi_app
+            
+            uvicorn.run(create_asgi_app(app), host='0.0.0.0', port=5000, log_level='warning')
+            return
+        
         app.run(
             host='0.0.0.0',
             port=5000,
@@ -1,9 +1,8 @@
 let currentMode = null;
-let previousLogCount = 0;
 let alarmSound = document.getElementById('alarm-sound');
 let lastThreatCheck = false;
-let logsInterval = null;
-let threatInterval = null;
+let eventSource = null;
+const MAX_LOGS = 50;
 
 // ============================================
 // MODE SELECTION & LAZY LOADING
@@ -50,53 +49,46 @@ function backToHome() {
 
     // Reset state
     currentMode = null;
-    previousLogCount = 0;
 }
 
 function startMonitoring() {
-    // Start log polling
-    logsInterval = setInterval(fetchLogs, 500);
-
-    // Start threat status polling
-    threatInterval = setInterval(checkThreatStatus, 500);
+    // Server-Sent Events: new logs and threat changes are pushed as they happen.
+    // EventSource reconnects on its own and resumes from the last event ID.
+    eventSource = new EventSource('/events');
+
+    eventSource.addEventListener('log', e => addLog(JSON.parse(e.data)));
+    eventSource.addEventListener('threat', e => updateThreatStatus(JSON.parse(e.data)));
+    eventSource.addEventListener('reset', clearLogs);
+    eventSource.onerror = () => console.warn('Event stream interrupted, reconnecting...');
 }
 
 function stopMonitoring() {
-    if (logsInterval) {
-        clearInterval(logsInterval);
-        logsInterval = null;
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
     }
 
-    if (threatInterval) {
-        clearInterval(threatInterval);
-        threatInterval = null;
-    }
+    clearLogs();
+    lastThreatCheck = false;
 }
 
 // ============================================
 // THREAT MONITORING
 // ============================================
-function checkThreatStatus() {
-    fetch('/threat_status')
-        .then(response => response.json())
-        .then(data => {
-            const alertBadge = document.getElementById('alert-status');
-
-            if (data.active_threat) {
-                alertBadge.style.display = 'flex';
-
-                if (!lastThreatCheck) {
-                    playAlarm();
-                }
-                lastThreatCheck = true;
-            } else {
-                alertBadge.style.display = 'none';
-                lastThreatCheck = false;
-            }
-        })
-        .catch(error => {
-            console.error('Error checking threat status:', error);
-        });
+function updateThreatStatus(data) {
+    const alertBadge = document.getElementById('alert-status');
+
+    if (data.active_threat) {
+        alertBadge.style.display = 'flex';
+
+        if (!lastThreatCheck) {
+            playAlarm();
+        }
+        lastThreatCheck = true;
+    } else {
+        alertBadge.style.display = 'none';
+        lastThreatCheck = false;
+    }
 }
 
 function playAlarm() {
@@ -113,32 +105,26 @@ function playAlarm() {
 // ============================================
 // LOGS
 // ============================================
-function fetchLogs() {
-    fetch('/logs')
-        .then(response => response.json())
-        .then(data => {
-            const logsContainer = document.getElementById('logs-container');
-            const logs = data.logs;
-
-            if (logs.length === 0) {
-                logsContainer.innerHTML = '<div class="log-empty">Waiting for detections...</div>';
-                return;
-            }
-
-            logsContainer.innerHTML = '';
-            logs.forEach(log => {
-                const logEntry = document.createElement('div');
-                logEntry.className = log.includes('🚨') ? 'log-entry threat' : 'log-entry';
-                logEntry.textContent = log;
-                logsContainer.appendChild(logEntry);
-            });
-
-            if (logs.length > previousLogCount) {
-                logsContainer.scrollTop = logsContainer.scrollHeight;
-                previousLogCount = logs.length;
-            }
-        })
-        .catch(error => {
-            console.error('Error fetching logs:', error);
-        });
+function clearLogs() {
+    document.getElementById('logs-container').innerHTML = '<div class="log-empty">Waiting for detections...</div>';
+}
+
+function addLog(data) {
+    const logsContainer = document.getElementById('logs-container');
+    const log = data.message;
+
+    if (!logsContainer.querySelector('.log-entry')) {
+        logsContainer.innerHTML = '';
+    }
+
+    const logEntry = document.createElement('div');
+    logEntry.className = data.threat || log.includes('🚨') ? 'log-entry threat' : 'log-entry';
+    logEntry.textContent = log;
+    logsContainer.appendChild(logEntry);
+
+    while (logsContainer.children.length > MAX_LOGS) {
+        logsContainer.firstElementChild.remove();
+    }
+
+    logsContainer.scrollTop = logsContainer.scrollHeight;
 }
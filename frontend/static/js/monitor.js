@@ -1,7 +1,7 @@
 // Live Monitor JavaScript
 let currentCamera = 0;
-let logsInterval = null;
-let threatInterval = null;
+let eventSource = null;
+let threatActive = false;
 let alarmSound = document.getElementById('alarm-sound');
 
 // Start monitoring when page loads
@@ -11,9 +11,11 @@ function startMonitoring() {
     const videoFeed = document.getElementById('video-feed');
     videoFeed.src = `/video_feed/camera?camera=${currentCamera}&t=` + new Date().getTime();
 
-    // Start polling for logs and threats
-    logsInterval = setInterval(fetchLogs, 500);
-    threatInterval = setInterval(checkThreatStatus, 500);
+    // Logs and threat changes are pushed by the server (Server-Sent Events)
+    eventSource = new EventSource('/events');
+    eventSource.addEventListener('log', e => addLog(JSON.parse(e.data)));
+    eventSource.addEventListener('threat', e => updateThreatStatus(JSON.parse(e.data)));
+    eventSource.addEventListener('reset', clearLogs);
 
     console.log('Monitoring started for camera:', currentCamera);
 }
@@ -22,8 +24,10 @@ function stopMonitoring() {
     const videoFeed = document.getElementById('video-feed');
     videoFeed.src = '';
 
-    if (logsInterval) clearInterval(logsInterval);
-    if (threatInterval) clearInterval(threatInterval);
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
 
     console.log('Monitoring stopped');
 }
@@ -43,56 +47,52 @@ function refreshFeed() {
     setTimeout(startMonitoring, 500);
 }
 
-function fetchLogs() {
-    fetch('/logs')
-        .then(response => response.json())
-        .then(data => {
-            const container = document.getElementById('logs-container');
-            const logs = data.logs || [];
-
-            if (logs.length === 0) {
-                container.innerHTML = '<div style="text-align: center; color: #9CA3AF; padding: 2rem;">Waiting for detections...</div>';
-                return;
-            }
-
-            container.innerHTML = logs.map(log => {
-                const isThreat = log.includes('🚨');
-                return `
-                    <div style="
-                        padding: 0.75rem;
-                        margin-bottom: 0.5rem;
-                        background: ${isThreat ? '#FEE2E2' : 'white'};
-                        border-left: 3px solid ${isThreat ? '#EF4444' : '#2563EB'};
-                        border-radius: 6px;
-                        font-size: 0.85rem;
-                        color: ${isThreat ? '#991B1B' : '#6B7280'};
-                    ">${log}</div>
-                `;
-            }).join('');
-
-            container.scrollTop = container.scrollHeight;
-        })
-        .catch(error => console.error('Error fetching logs:', error));
+function addLog(data) {
+    const container = document.getElementById('logs-container');
+    const log = data.message;
+    const isThreat = data.threat || log.includes('🚨');
+
+    if (!container.querySelector('.log-item')) {
+        container.innerHTML = '';
+    }
+
+    const entry = document.createElement('div');
+    entry.className = 'log-item';
+    entry.style.cssText = `
+        padding: 0.75rem;
+        margin-bottom: 0.5rem;
+        background: ${isThreat ? '#FEE2E2' : 'white'};
+        border-left: 3px solid ${isThreat ? '#EF4444' : '#2563EB'};
+        border-radius: 6px;
+        font-size: 0.85rem;
+        color: ${isThreat ? '#991B1B' : '#6B7280'};
+    `;
+    entry.textContent = log;
+    container.appendChild(entry);
+
+    while (container.children.length > 50) {
+        container.firstElementChild.remove();
+    }
+
+    container.scrollTop = container.scrollHeight;
 }
 
-function checkThreatStatus() {
-    fetch('/threat_status')
-        .then(response => response.json())
-        .then(data => {
-            const banner = document.getElementById('threat-banner');
-            const status = document.getElementById('recording-status');
-
-            if (data.active_threat) {
-                banner.style.display = 'block';
-                status.textContent = '🚨 THREAT DETECTED';
-                status.style.color = '#EF4444';
-                playAlarm();
-            } else {
-                status.textContent = 'Monitoring Active';
-                status.style.color = '#10B981';
-            }
-        })
-        .catch(error => console.error('Error checking threat:', error));
+function updateThreatStatus(data) {
+    const banner = document.getElementById('threat-banner');
+    const status = document.getElementById('recording-status');
+
+    if (data.active_threat) {
+        banner.style.display = 'block';
+        status.textContent = '🚨 THREAT DETECTED';
+        status.style.color = '#EF4444';
+        if (!threatActive) {
+            playAlarm();
+        }
+    } else {
+        status.textContent = 'Monitoring Active';
+        status.style.color = '#10B981';
+    }
+    threatActive = data.active_threat;
 }
 
 function playAlarm() {
@@ -109,7 +109,6 @@ function dismissAlert() {
 }
 
 function clearLogs() {
-    // This would call a backend endpoint to clear logs
     document.getElementById('logs-container').innerHTML = '<div style="text-align: center; color: #9CA3AF; padding: 2rem;">Logs cleared</div>';
 }
 